@@ -10,23 +10,43 @@ import pickle
 import os
 from config import BLOCK_SIZE, WIDTH, HEIGHT, COLS
 from random import randint
+from qtable import QTable, BoundedQTable
+from replay_buffer import ReplayBuffer
 
 
 class QAgent:
-    def __init__(self):
+    def __init__(self, dense=False, replay=0, alpha=0.1, gamma=0.95, epsilon_decay=0.9999, min_epsilon=0.1,
+                 max_states=0, evict_policy='cold'):
         """
             Инициализация агента:
             - actions: список дискретных действий по оси X (TODO: увеличить количество действий)
+            - dense: хранить Q-таблицу в непрерывном массиве float32 (QTable) вместо словаря
+            - replay: ёмкость буфера воспроизведения опыта (0 - без буфера; буфер требует QTable)
             - q_table: словарь Q-таблицы (состояния -> значения действий)
              - epsilon: коэффициент исследования (жадность)
             - alpha: скорость обучения
             - gamma: коэффициент дисконтирования будущих наград
+            - epsilon_decay, min_epsilon: множитель и нижняя граница epsilon для decay_epsilon
+            - max_states, evict_policy: ограничение Q-таблицы (BoundedQTable) количеством состояний
+              и правило вытеснения (0 - без ограничения; несовместимо с буфером воспроизведения,
+              который хранит номера строк)
         """
+        if max_states and replay:
+            raise ValueError("ограниченная Q-таблица несовместима с буфером воспроизведения")
         self.actions = [i for i in range(BLOCK_SIZE // 2, 900, BLOCK_SIZE)]  # дискретные X
-        self.q_table = {}
+        self.dense = dense or replay > 0 or max_states > 0
+        self.max_states = max_states
+        self.evict_policy = evict_policy
+        if max_states:
+            self.q_table = BoundedQTable(len(self.actions), max_states, evict_policy)
+        else:
+            self.q_table = QTable(len(self.actions)) if self.dense else {}
+        self.replay = ReplayBuffer(replay) if replay else None
         self.epsilon = 1.0
-        self.alpha = 0.1        # скорость обучения
-        self.gamma = 0.95       # важность будущих наград
+        self.alpha = alpha      # скорость обучения
+        self.gamma = gamma      # важность будущих наград
+        self.epsilon_decay = epsilon_decay
+        self.min_epsilon = min_epsilon
 
     def get_state(self, blocks):
         """
@@ -69,6 +89,10 @@ class QAgent:
         """
         if randint(0, 100) < int(self.epsilon * 100):
             return randint(0, len(self.actions) - 1)
+        elif self.dense:
+            # Чтение без выделения строки: у отсутствующего состояния все значения нулевые (argmax - 0)
+            row = self.q_table.get(state)
+            return int(np.argmax(self.q_table.values[row])) if row is not None else 0
         else:
             self.ensure_state_exists(state)
             return int(np.argmax(self.q_table[state]))
@@ -81,22 +105,39 @@ class QAgent:
         Аргументы:
             state (tuple): состояние для проверки
         """
-        if state not in self.q_table:
+        if self.dense:
+            self.q_table.row(state)
+        elif state not in self.q_table:
             #print('Неизвестное состояние')
             self.q_table[state] = np.zeros(len(self.actions))
 
 
-    def learn(self, prev_state, action, reward, next_state):
+    def learn(self, prev_state, action, reward, next_state, done=False):
         """
         Обновление Q-значений по формуле Q-обучения.
+        Если у агента есть буфер воспроизведения, переход также сохраняется в нём.
 
         Аргументы:
             prev_state (tuple): предыдущее состояние
             action (int): выполненное действие
             reward (float): полученная награда
             next_state (tuple): новое состояние
+            done (bool): переход завершил эпизод (используется только буфером воспроизведения)
         """
         #print(prev_state, next_state)
+        if self.dense:
+            # Строки получаются до обращения к массиву: он может быть перевыделен при росте.
+            # Следующее состояние только читается, строка для него выделяется лишь для буфера
+            # воспроизведения (отсутствующее состояние оценивается нулём)
+            table = self.q_table
+            p = table.row(prev_state)
+            n = table.row(next_state) if self.replay is not None else table.get(next_state)
+            q = table.values
+            future = q[n].max() if n is not None else 0.0
+            q[p, action] += self.alpha * (reward + self.gamma * future - q[p, action])
+            if self.replay is not None:
+                self.replay.push(p, action, reward, n, done)
+            return
         self.ensure_state_exists(prev_state)
         self.ensure_state_exists(next_state)
         predict = self.q_table[prev_state][action]  # оцениваем ошибку предсказания
@@ -104,16 +145,80 @@ class QAgent:
         self.q_table[prev_state][action] += self.alpha * (target - predict)
 
 
-    def decay_epsilon(self, factor=0.9999, min_eps=0.1):
+    def learn_batch(self, batch_size=32):
+        """
+        Векторизованное обновление Q-значений по случайной мини-выборке из буфера воспроизведения.
+        Для завершающих эпизод переходов цель не включает оценку следующего состояния.
+        Повторяющиеся в выборке пары (состояние, действие) получают одно обновление
+        со средней ошибкой, а не перезаписывают друг друга.
+
+        Аргументы:
+            batch_size (int): размер мини-выборки
+        """
+        if self.replay is None or not len(self.replay):
+            return
+        states, actions, rewards, next_states, dones = self.replay.sample(batch_size)
+        q = self.q_table.values
+        target = rewards + self.gamma * q[next_states].max(axis=1) * ~dones
+        delta = self.alpha * (target - q[states, actions])
+
+        n_actions = q.shape[1]
+        cells, inverse, counts = np.unique(states * n_actions + actions, return_inverse=True, return_counts=True)
+        q.reshape(-1)[cells] += np.bincount(inverse, weights=delta) / counts
+
+    def decay_epsilon(self, factor=None, min_eps=None):
         """
         Понижение коэффициента исследования epsilon с заданным фактором и минимальным значением.
 
         Аргументы:
-            factor (float): множитель для уменьшения epsilon (TODO: увеличить)
-            min_eps (float): минимальное значение epsilon
+            factor (float | None): множитель для уменьшения epsilon (None - epsilon_decay агента)
+            min_eps (float | None): минимальное значение epsilon (None - min_epsilon агента)
         """
+        factor = self.epsilon_decay if factor is None else factor
+        min_eps = self.min_epsilon if min_eps is None else min_eps
         self.epsilon = max(min_eps, self.epsilon * factor)
 
+    def use_dense_table(self):
+        """
+        Перевод агента на Q-таблицу в непрерывном массиве с сохранением текущих значений.
+        """
+        if not self.dense:
+            self.q_table = QTable.from_dict(self.q_table, len(self.actions))
+            self.dense = True
+
+    def use_bounded_table(self, max_states, policy='cold'):
+        """
+        Ограничение Q-таблицы max_states состояниями (BoundedQTable) с сохранением значений.
+
+        Аргументы:
+            max_states (int): наибольшее количество состояний
+            policy (str): правило вытеснения (lru, lfu, cold)
+        """
+        if self.replay is not None:
+            raise ValueError("ограниченная Q-таблица несовместима с буфером воспроизведения")
+        self.dense = True
+        self.max_states = max_states
+        self.evict_policy = policy
+        self.q_table = BoundedQTable.bound(self.q_table, len(self.actions), max_states, policy)
+
+    def adopt_table(self, q_table):
+        """
+        Приведение загруженной таблицы к формату агента: словарь, QTable или BoundedQTable.
+
+        Аргументы:
+            q_table (dict | QTable): загруженная таблица
+
+        Возвращает:
+            dict | QTable: таблица в формате агента
+        """
+        if self.max_states:
+            return BoundedQTable.bound(q_table, len(self.actions), self.max_states, self.evict_policy)
+        if self.dense and (not isinstance(q_table, QTable) or isinstance(q_table, BoundedQTable)):
+            return QTable.from_dict(dict(q_table.items()), len(self.actions))
+        if not self.dense and isinstance(q_table, QTable):
+            return q_table.to_dict()
+        return q_table
+
     def save(self, filename='q_table.pkl'):
         """
         Сохранение Q-таблицы в файл.
@@ -126,10 +231,12 @@ class QAgent:
     def load(self, filename='q_table.pkl'):
         """
         Загрузка Q-таблицы из файла, если файл существует.
+            Таблица приводится к формату агента (adopt_table): словарь, QTable или BoundedQTable.
 
         Аргументы:
             filename (str): имя файла для загрузки
         """
         if os.path.exists(filename):
             with open(filename, 'rb') as f:
-                self.q_table = pickle.load(f)
+                q_table = pickle.load(f)
+            self.q_table = self.adopt_table(q_table)
@@ -0,0 +1,71 @@
+# Раздел: Бенчмарк масштабирования по количеству блоков
+# Назначение: Сравнение стоимости падения блока с заморозкой нижних слоёв и без неё
+#   при маленьком BLOCK_SIZE (по умолчанию 25) и количестве блоков от 30 до 500+
+# Входные данные:
+#   NIRS_BLOCK_SIZE - размер блока (по умолчанию 25, задаётся до импорта config)
+#   --checkpoints - количества блоков, на которых снимаются замеры
+#   --window - по скольким последним падениям усредняется время
+#   --settle - прогон физики падения до покоя блоков
+# Выходные данные:
+#   Таблица в stdout и по одной JSON-строке на замер (режим, блоки, мс на падение, динамических блоков)
+
+import os
+
+os.environ.setdefault('NIRS_BLOCK_SIZE', '25')
+os.environ.setdefault('NIRS_MAX_BLOCKS', '100000')
+
+import argparse
+import json
+import time
+from agent import QAgent
+from config import BLOCK_SIZE
+from game import Game
+from physics import create_space
+
+
+def run(freeze, checkpoints, window, settle):
+    """
+    Заполнение экрана блоками слой за слоем (действия по кругу слева направо)
+    с замером времени падений перед каждой контрольной точкой.
+
+    Аргументы:
+        freeze (bool): режим заморозки нижних слоёв
+        checkpoints (list): количества блоков для замеров
+        window (int): количество падений, по которым усредняется время
+        settle (bool): режим определения покоя блоков
+
+    Возвращает:
+        list: словари с результатами замеров
+    """
+    agent = QAgent()
+    agent.epsilon = 0.0
+    game = Game(space=create_space(), agent=agent, settle=settle, freeze=freeze)
+    results = []
+    times = []
+    for n in range(1, max(checkpoints) + 1):
+        start = time.perf_counter()
+        block = game.spawn_block((n - 1) % len(agent.actions))
+        game.fall(block)
+        game.land_block(block)
+        game.idle()
+        times.append(time.perf_counter() - start)
+        if n in checkpoints:
+            recent = times[-window:]
+            results.append({'freeze': freeze, 'settle': settle, 'block_size': BLOCK_SIZE, 'blocks': n,
+                            'ms_per_drop': 1000 * sum(recent) / len(recent),
+                            'dynamic_blocks': n - game.frozen})
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Бенчмарк заморозки нижних слоёв")
+    parser.add_argument('--checkpoints', type=int, nargs='+', default=[30, 100, 200, 300, 400, 500, 600])
+    parser.add_argument('--window', type=int, default=10)
+    parser.add_argument('--settle', action='store_true')
+    args = parser.parse_args()
+
+    for freeze in (False, True):
+        for r in run(freeze, args.checkpoints, args.window, args.settle):
+            print(f"freeze={str(freeze):5}  blocks={r['blocks']:4d}  ms/drop={r['ms_per_drop']:8.2f}  "
+                  f"dynamic={r['dynamic_blocks']:4d}")
+            print(json.dumps(r))
@@ -0,0 +1,57 @@
+# Раздел: Бенчмарк параллельного обучения
+# Назначение: Измерение количества поколений в час в зависимости от числа процессов-воркеров
+# Входные данные:
+#   --workers - список количеств воркеров (по умолчанию 1, 2, 4, ... до числа ядер)
+#   --rounds - количество измеряемых раундов синхронизации
+#   --sync-every - эпизодов на воркер между синхронизациями
+# Выходные данные:
+#   Таблица в stdout и по одной JSON-строке на конфигурацию (поколения в час, ускорение, эффективность)
+
+import argparse
+import json
+import multiprocessing as mp
+import time
+from agent import QAgent
+from parallel import ParallelTrainer
+
+
+def measure(workers, rounds, sync_every):
+    """
+    Прогон rounds раундов с workers воркерами на свежем агенте (после одного прогревочного раунда).
+
+    Аргументы:
+        workers (int): количество воркеров
+        rounds (int): количество измеряемых раундов
+        sync_every (int): эпизодов на воркер за раунд
+
+    Возвращает:
+        float: поколений в час
+    """
+    with ParallelTrainer(workers=workers, sync_every=sync_every, agent=QAgent()) as trainer:
+        trainer.run_round()
+        start = time.perf_counter()
+        episodes = sum(trainer.run_round() for _ in range(rounds))
+        elapsed = time.perf_counter() - start
+    return episodes / elapsed * 3600
+
+
+if __name__ == '__main__':
+    cores = mp.cpu_count()
+    default_workers = [1]
+    while default_workers[-1] * 2 <= cores:
+        default_workers.append(default_workers[-1] * 2)
+
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельного обучения")
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--sync-every', type=int, default=10)
+    args = parser.parse_args()
+
+    base = None
+    for w in args.workers:
+        rate = measure(w, args.rounds, args.sync_every)
+        base = base or rate / w
+        speedup = rate / base
+        print(f"workers={w:3d}  gens/hour={rate:12.0f}  speedup={speedup:6.2f}  efficiency={speedup / w:5.2f}")
+        print(json.dumps({'workers': w, 'cores': cores, 'gens_per_hour': rate,
+                          'speedup': speedup, 'efficiency': speedup / w}))
@@ -0,0 +1,178 @@
+# Раздел: Воспроизводимый бенчмарк пропускной способности обучения
+# Назначение: Измерение эпизодов в секунду, шагов физики в секунду и времени по фазам
+#   (space.step, get_state, get_reward, learn, отрисовка) для нескольких конфигураций
+#   BLOCK_SIZE / MAX_BLOCKS при фиксированных зёрнах генераторов случайных чисел
+# Входные данные:
+#   --configs - конфигурации BLOCK_SIZE:MAX_BLOCKS (каждая прогоняется в отдельном процессе,
+#     так как config читает NIRS_BLOCK_SIZE / NIRS_MAX_BLOCKS при импорте)
+#   --episodes, --seed, --epsilon - объём прогона, зерно random / np.random и коэффициент исследования
+#   --settle, --freeze - режимы игры (см. Game)
+#   --render - отрисовка после каждого падения блока (Pygame, без дисплея - драйвер dummy)
+#   --output - файл JSON-строк с результатами (дописывается)
+#   --baseline - файл JSON-строк прошлого прогона для сравнения
+# Выходные данные:
+#   Таблица в stdout и по одной JSON-строке на конфигурацию
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from profiler import Profiler
+
+PHASES = ('space.step', 'get_state', 'get_reward', 'learn', 'render')
+
+
+def run(episodes, seed, epsilon, settle, freeze, render):
+    """
+    Прогон episodes эпизодов в текущем процессе (конфигурация уже задана окружением).
+
+    Аргументы:
+        episodes (int): количество эпизодов
+        seed (int): зерно random (QAgent.choose_action) и np.random
+        epsilon (float): коэффициент исследования (не понижается во время прогона)
+        settle (bool): режим определения покоя блоков
+        freeze (bool): режим заморозки нижних слоёв
+        render (bool): отрисовка после каждого падения блока
+
+    Возвращает:
+        dict: результаты замеров
+    """
+    import random
+    import numpy as np
+    from agent import QAgent
+    from config import BLOCK_SIZE, MAX_BLOCKS
+    from game import Game
+    from physics import create_space
+    from trainer import Trainer
+
+    random.seed(seed)
+    np.random.seed(seed)
+    agent = QAgent()
+    agent.epsilon = epsilon
+    agent.decay_epsilon = lambda *args, **kwargs: None
+    space = create_space()
+    game = Game(space=space, agent=agent, settle=settle, freeze=freeze)
+    trainer = Trainer(game)
+
+    # Собственное время фаз: get_state внутри get_reward не входит в get_reward
+    timer = Profiler(exclusive=True)
+    timer.wrap(space, 'step', 'space.step')
+    timer.wrap(game, 'state', 'get_state')
+    timer.wrap(game, 'get_reward', 'get_reward')
+    timer.wrap(agent, 'learn', 'learn')
+    draw = None
+    if render:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        import render as render_module
+
+        timer.wrap(render_module, 'draw', 'render')
+        draw = render_module.draw
+
+    start = time.perf_counter()
+    for _ in range(episodes):
+        while not game.finished:
+            game.advance()
+            if draw is not None:
+                draw(space, [f"Blocks: {game.placed_blocks}"])
+        trainer.finish_episode()
+    elapsed = time.perf_counter() - start
+
+    return {'block_size': BLOCK_SIZE, 'max_blocks': MAX_BLOCKS, 'seed': seed, 'epsilon': epsilon,
+            'settle': settle, 'freeze': freeze, 'render': render, 'episodes': episodes,
+            'drops': trainer.drops, 'physics_steps': trainer.physics_steps, 'seconds': elapsed,
+            'episodes_per_sec': episodes / elapsed, 'steps_per_sec': trainer.physics_steps / elapsed,
+            'mean_blocks': trainer.drops / episodes, 'q_states': len(agent.q_table),
+            'phase_seconds': {p: timer.seconds.get(p, 0.0) for p in PHASES},
+            'phase_calls': {p: timer.calls.get(p, 0) for p in PHASES}}
+
+
+def spawn(config, args):
+    """
+    Прогон одной конфигурации в дочернем процессе с NIRS_BLOCK_SIZE / NIRS_MAX_BLOCKS.
+
+    Аргументы:
+        config (tuple): (BLOCK_SIZE, MAX_BLOCKS)
+        args (argparse.Namespace): параметры прогона
+
+    Возвращает:
+        dict: результаты замеров дочернего процесса
+    """
+    block_size, max_blocks = config
+    env = dict(os.environ, NIRS_BLOCK_SIZE=str(block_size), NIRS_MAX_BLOCKS=str(max_blocks))
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--episodes', str(args.episodes),
+           '--seed', str(args.seed), '--epsilon', str(args.epsilon)]
+    cmd += [f'--{flag}' for flag in ('settle', 'freeze', 'render') if getattr(args, flag)]
+    out = subprocess.run(cmd, env=env, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def load_baseline(path):
+    """
+    Чтение прошлых результатов, индексированных по параметрам прогона.
+
+    Аргументы:
+        path (str): файл JSON-строк
+
+    Возвращает:
+        dict: ключ параметров прогона (см. key) -> результат (последний в файле)
+    """
+    baseline = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                r = json.loads(line)
+                baseline[key(r)] = r
+    return baseline
+
+
+def key(result):
+    """
+    Возвращает:
+        tuple: параметры, определяющие нагрузку прогона (результаты сравнимы только при их совпадении)
+    """
+    return tuple(result[field] for field in ('block_size', 'max_blocks', 'seed', 'epsilon', 'episodes',
+                                             'settle', 'freeze', 'render'))
+
+
+def parse_config(text):
+    block_size, max_blocks = text.split(':')
+    return int(block_size), int(max_blocks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Воспроизводимый бенчмарк обучения")
+    parser.add_argument('--configs', type=parse_config, nargs='+',
+                        default=[(125, 30), (75, 60), (50, 100), (25, 300)])
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--epsilon', type=float, default=1.0)
+    parser.add_argument('--settle', action='store_true')
+    parser.add_argument('--freeze', action='store_true')
+    parser.add_argument('--render', action='store_true')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args.episodes, args.seed, args.epsilon, args.settle, args.freeze, args.render)))
+        sys.exit()
+
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    for config in args.configs:
+        r = spawn(config, args)
+        phases = '  '.join(f"{p}={1000 * r['phase_seconds'][p] / r['episodes']:.2f}"
+                           for p in PHASES if r['phase_calls'][p])
+        line = (f"block={r['block_size']:4d}  max={r['max_blocks']:4d}  eps/s={r['episodes_per_sec']:8.1f}  "
+                f"steps/s={r['steps_per_sec']:9.0f}  ms/episode: {phases}")
+        base = baseline.get(key(r))
+        if base is not None:
+            r['baseline_ratio'] = r['episodes_per_sec'] / base['episodes_per_sec']
+            line += f"  vs baseline={r['baseline_ratio']:.2f}x"
+        print(line)
+        print(json.dumps(r))
+        if args.output:
+            with open(args.output, 'a') as f:
+                f.write(json.dumps(r) + '\n')
@@ -0,0 +1,121 @@
+# Раздел: Кэш переходов физики
+# Назначение: Запоминание результата падения блока для квантованной раскладки блоков и действия,
+#   чтобы при повторе той же пары (раскладка, действие) восстановить позы блоков вместо прогона физики;
+#   запоминаются только падения, завершившиеся покоем всех блоков
+# Входные данные:
+#   capacity (int) - максимальное количество записей (вытеснение давно не использованных, LRU)
+#   quantum, angle_quantum (float) - шаг квантования координат (пиксели) и угла (радианы)
+# Выходные данные:
+#   TransitionCache - кэш с методами key, get, put, restore и статистикой hits / misses / evictions
+
+from collections import OrderedDict
+
+
+class TransitionCache:
+    def __init__(self, capacity=100000, quantum=1.0, angle_quantum=0.01):
+        """
+        Инициализация кэша:
+            - entries: упорядоченный словарь ключ -> (позы блоков, состояние агента)
+            - hits, misses, evictions: статистика попаданий, промахов и вытеснений
+        """
+        self.capacity = capacity
+        self.quantum = quantum
+        self.angle_quantum = angle_quantum
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, blocks, action):
+        """
+        Ключ перехода: квантованные позы блоков (в порядке размещения) с флагом заморозки
+        и индекс действия. Замороженные блоки restore не двигает, поэтому запись применима
+        только при тех же замороженных блоках.
+
+        Аргументы:
+            blocks (list): блоки до падения нового блока
+            action (int): индекс действия агента
+
+        Возвращает:
+            tuple: ключ кэша
+        """
+        q = self.quantum
+        aq = self.angle_quantum
+        layout = []
+        for b in blocks:
+            x, y = b.position
+            layout.append((round(x / q), round(y / q), round(b.angle / aq), b.body_type != b.DYNAMIC))
+        return tuple(layout), action
+
+    def get(self, key):
+        """
+        Поиск перехода; найденная запись становится самой свежей.
+
+        Аргументы:
+            key (tuple): ключ кэша
+
+        Возвращает:
+            tuple | None: (позы блоков, состояние агента) или None при промахе
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, poses, state):
+        """
+        Сохранение перехода с вытеснением самой давней записи при переполнении.
+
+        Аргументы:
+            key (tuple): ключ кэша
+            poses (tuple): позы (x, y, angle) всех блоков после падения (блоки в покое)
+            state (tuple): состояние агента после падения
+        """
+        self.entries[key] = (poses, state)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def poses(blocks):
+        """
+        Снимок поз блоков.
+
+        Аргументы:
+            blocks (list): блоки
+
+        Возвращает:
+            tuple: позы (x, y, angle) в порядке блоков
+        """
+        return tuple((*b.position, b.angle) for b in blocks)
+
+    @staticmethod
+    def restore(blocks, poses):
+        """
+        Восстановление поз блоков в покое. Статические (замороженные) блоки не двигаются
+        и пропускаются.
+
+        Аргументы:
+            blocks (list): блоки, включая только что созданный
+            poses (tuple): позы из кэша в том же порядке
+        """
+        for b, (x, y, angle) in zip(blocks, poses):
+            if b.body_type != b.DYNAMIC:
+                continue
+            b.position = x, y
+            b.angle = angle
+            b.velocity = 0, 0
+            b.angular_velocity = 0
+
+    def stats(self):
+        """
+        Возвращает:
+            dict: размер кэша, попадания, промахи, вытеснения и доля попаданий
+        """
+        total = self.hits + self.misses
+        return {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hits / total if total else 0.0}
@@ -0,0 +1,253 @@
+# Раздел: Контрольные точки обучения
+# Назначение: Периодическое атомарное сохранение Q-таблицы и состояния тренера в компактном
+#   столбцовом формате (закодированные состояния + матрица значений float32) с записью в фоновом потоке
+# Входные данные:
+#   path (str) - файл контрольной точки
+#   agent (QAgent) - агент, Q-таблица и параметры которого сохраняются
+#   trainer (Trainer | ParallelTrainer) - тренер со статистикой обучения
+# Выходные данные:
+#   Файл контрольной точки: заголовок JSON и выровненные массивы states (int16) и values (float32);
+#   при загрузке values может отображаться в память (np.memmap) без чтения файла целиком
+
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+from config import COLS
+from qtable import QTable
+
+MAGIC = b'NIRSCKPT'
+ALIGN = 64
+TRAINER_FIELDS = ('generation', 'best_score', 'physics_steps', 'drops')
+
+
+def snapshot(agent, trainer=None):
+    """
+    Снимок состояния обучения для записи. Вызывается в потоке обучения:
+    копирует значения, чтобы дальнейшее обучение не меняло сохраняемые данные.
+
+    Аргументы:
+        agent (QAgent): агент
+        trainer (Trainer | ParallelTrainer | None): тренер
+
+    Возвращает:
+        tuple: (states, values, meta) - список состояний, матрица значений и параметры обучения
+    """
+    table = agent.q_table
+    if isinstance(table, QTable):
+        # Порядок строк может не совпадать с порядком index (BoundedQTable переставляет строки)
+        states = list(table.index)
+        values = table.values[list(table.index.values())]
+    else:
+        states = list(table)
+        values = np.array([table[s] for s in states], dtype=np.float32).reshape(len(states), len(agent.actions))
+    meta = {'epsilon': agent.epsilon, 'alpha': agent.alpha, 'gamma': agent.gamma,
+            'epsilon_decay': agent.epsilon_decay, 'min_epsilon': agent.min_epsilon, 'actions': len(agent.actions)}
+    if trainer is not None:
+        meta.update({field: getattr(trainer, field) for field in TRAINER_FIELDS})
+    return states, values, meta
+
+
+def encode_states(states):
+    """
+    Кодирование состояний матрицей int16 шириной COLS + 1; короткие состояния дополняются -1.
+
+    Аргументы:
+        states (list): кортежи высот по колонкам
+
+    Возвращает:
+        np.ndarray: матрица закодированных состояний
+    """
+    encoded = np.full((len(states), COLS + 1), -1, dtype=np.int16)
+    for i, s in enumerate(states):
+        encoded[i, :len(s)] = s
+    return encoded
+
+
+def decode_states(encoded):
+    """
+    Восстановление кортежей состояний из матрицы encode_states.
+
+    Аргументы:
+        encoded (np.ndarray): матрица закодированных состояний
+
+    Возвращает:
+        list: кортежи высот по колонкам
+    """
+    if not len(encoded):
+        return []
+    # Кортежи собираются по столбцам (zip), что в несколько раз быстрее поштучного tuple(row);
+    # полные строки шириной COLS + 1 (состояние пустой игры) редки и исправляются отдельно
+    states = list(zip(*encoded[:, :-1].T.tolist()))
+    for i in np.flatnonzero(encoded[:, -1] != -1).tolist():
+        states[i] = tuple(encoded[i].tolist())
+    return states
+
+
+def write(path, states, values, meta):
+    """
+    Атомарная запись контрольной точки: данные пишутся во временный файл
+    в том же каталоге, который затем переименовывается поверх path.
+
+    Аргументы:
+        path (str): файл контрольной точки
+        states (list): состояния
+        values (np.ndarray): матрица значений
+        meta (dict): параметры обучения
+    """
+    arrays = {'states': encode_states(states), 'values': np.ascontiguousarray(values, dtype=np.float32)}
+    header = {'meta': meta, 'arrays': {}}
+    offset = 0
+    for name, arr in arrays.items():
+        header['arrays'][name] = {'dtype': arr.dtype.str, 'shape': arr.shape, 'offset': offset}
+        offset += -(-arr.nbytes // ALIGN) * ALIGN
+    raw = json.dumps(header).encode()
+    start = -(-(len(MAGIC) + 8 + len(raw)) // ALIGN) * ALIGN
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.ckpt-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + len(raw).to_bytes(8, 'little') + raw)
+            for name, arr in arrays.items():
+                f.seek(start + header['arrays'][name]['offset'])
+                f.write(arr.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def save(path, agent, trainer=None):
+    """
+    Синхронное сохранение контрольной точки.
+
+    Аргументы:
+        path (str): файл контрольной точки
+        agent (QAgent): агент
+        trainer (Trainer | ParallelTrainer | None): тренер
+    """
+    write(path, *snapshot(agent, trainer))
+
+
+def load(path, agent, trainer=None, mmap=False):
+    """
+    Загрузка контрольной точки в агента и тренера.
+
+    Аргументы:
+        path (str): файл контрольной точки
+        agent (QAgent): агент (таблица приводится к его формату: QTable, BoundedQTable или словарь)
+        trainer (Trainer | ParallelTrainer | None): тренер
+        mmap (bool): отобразить матрицу значений в память (копирование при записи)
+            вместо чтения файла целиком. Отображение занимает ровно сохранённые строки, поэтому
+            первое новое состояние копирует его в память: выигрыш есть только при чтении таблицы
+            (например, evaluate.py). Без mmap значения читаются в массив с запасом строк для роста
+
+    Возвращает:
+        dict: параметры обучения из контрольной точки
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: не файл контрольной точки")
+        size = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(size))
+    start = -(-(len(MAGIC) + 8 + size) // ALIGN) * ALIGN
+
+    arrays = {}
+    for name, info in header['arrays'].items():
+        shape = tuple(info['shape'])
+        if mmap and np.prod(shape):
+            arrays[name] = np.memmap(path, dtype=info['dtype'], mode='c', offset=start + info['offset'], shape=shape)
+        elif name == 'values' and agent.dense:
+            # Строки читаются в начало массива с запасом, как при росте QTable.row
+            buffer = np.zeros((max(2 * shape[0], 1024), *shape[1:]), dtype=info['dtype'])
+            with open(path, 'rb') as f:
+                f.seek(start + info['offset'])
+                f.readinto(buffer[:shape[0]])
+            arrays[name] = buffer
+        else:
+            count = int(np.prod(shape))
+            arrays[name] = np.fromfile(path, dtype=info['dtype'], count=count,
+                                       offset=start + info['offset']).reshape(shape)
+
+    meta = header['meta']
+    if meta['actions'] != len(agent.actions):
+        raise ValueError(f"{path}: {meta['actions']} действий в контрольной точке, у агента {len(agent.actions)}")
+    states = decode_states(arrays['states'])
+    values = arrays['values']
+    if agent.dense:
+        table = QTable(len(agent.actions), capacity=1)
+        table.index = dict(zip(states, range(len(states))))
+        table.values = values if len(states) else table.values
+        agent.q_table = agent.adopt_table(table) if agent.max_states else table
+    else:
+        # Строки словаря - представления одного массива, а не отдельные массивы на каждое состояние
+        agent.q_table = dict(zip(states, np.array(values, dtype=np.float64)))
+    agent.epsilon, agent.alpha, agent.gamma = meta['epsilon'], meta['alpha'], meta['gamma']
+    # В контрольных точках до появления параметров расписания epsilon остаются значения агента
+    agent.epsilon_decay = meta.get('epsilon_decay', agent.epsilon_decay)
+    agent.min_epsilon = meta.get('min_epsilon', agent.min_epsilon)
+    if trainer is not None:
+        restore_trainer(trainer, meta)
+    return meta
+
+
+def restore_trainer(trainer, meta):
+    """
+    Восстановление статистики тренера из параметров контрольной точки
+    (если тренер создаётся уже после загрузки агента).
+
+    Аргументы:
+        trainer (Trainer | ParallelTrainer): тренер
+        meta (dict): параметры обучения, возвращённые load
+    """
+    for field in TRAINER_FIELDS:
+        if field in meta:
+            setattr(trainer, field, meta[field])
+
+
+class Checkpointer:
+    def __init__(self, path, every=1000):
+        """
+        Периодические контрольные точки в фоновом потоке:
+            - path: файл контрольной точки
+            - every: период сохранения в поколениях
+            - last: поколение последнего сохранения
+        """
+        self.path = path
+        self.every = every
+        self.last = 0
+        self.thread = None
+
+    def maybe_save(self, agent, trainer):
+        """
+        Сохранение, если с последней контрольной точки прошло не меньше every поколений.
+        Снимок делается сразу, запись - в фоновом потоке; обучение не ждёт диска.
+
+        Аргументы:
+            agent (QAgent): агент
+            trainer (Trainer | ParallelTrainer): тренер
+
+        Возвращает:
+            bool: True, если запись запущена
+        """
+        if trainer.generation - self.last < self.every:
+            return False
+        self.wait()
+        self.last = trainer.generation
+        data = snapshot(agent, trainer)
+        self.thread = threading.Thread(target=write, args=(self.path, *data), daemon=True)
+        self.thread.start()
+        return True
+
+    def wait(self):
+        """
+        Ожидание завершения фоновой записи.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,132 @@
+# Раздел: Инкрементальный индекс высот колонок
+# Назначение: Хранение клетки (колонка, уровень) каждого блока, высот колонок и границ по X,
+#   чтобы состояние агента, проверка валидности и награда читались за O(COLS), а не за O(блоков)
+# Входные данные:
+#   blocks (list) - список блоков игры (pymunk.Body) в порядке размещения
+# Выходные данные:
+#   heights - высоты колонок, fallen - количество блоков за пределами колонок,
+#   below - количество блоков ниже нижней границы экрана, min_x / max_x - границы блоков по X,
+#   active - номера незамороженных (динамических) блоков
+
+from config import HEIGHT, BLOCK_SIZE, COLS
+
+
+def cell_of(x, y):
+    """
+    Клетка блока по координатам центра, как в QAgent.get_state.
+
+    Аргументы:
+        x (float): координата X центра блока
+        y (float): координата Y центра блока
+
+    Возвращает:
+        tuple: (колонка, уровень); уровень <= 0 означает, что блок ниже нижней границы экрана
+    """
+    return int(x // BLOCK_SIZE), int((HEIGHT - y) // BLOCK_SIZE) + 1
+
+
+class ColumnIndex:
+    def __init__(self):
+        """
+        Инициализация пустого индекса:
+            - cells, xs: клетка и координата X каждого блока (в порядке списка блоков)
+            - active: номера динамических блоков; замороженные блоки не двигаются и не перечитываются
+            - levels: по каждой колонке словарь уровень -> количество блоков
+            - heights: высота каждой колонки (максимальный уровень, не меньше 0)
+            - fallen: количество блоков вне колонок (упавших за край)
+            - below: количество блоков ниже нижней границы экрана
+            - dirty: физика сделала шаги после последнего обновления индекса
+        """
+        self.cells = []
+        self.xs = []
+        self.active = []
+        self.levels = [{} for _ in range(COLS)]
+        self.heights = [0] * COLS
+        self.fallen = 0
+        self.below = 0
+        self.min_x = self.max_x = 0.0
+        self.dirty = False
+
+    def clear(self):
+        """
+        Очистка индекса при сбросе игры.
+        """
+        self.__init__()
+
+    def add(self, block):
+        """
+        Добавление нового блока в конец индекса.
+
+        Аргументы:
+            block (pymunk.Body): размещённый блок
+        """
+        x, y = block.position
+        cell = cell_of(x, y)
+        if self.xs:
+            self.min_x = min(self.min_x, x)
+            self.max_x = max(self.max_x, x)
+        else:
+            self.min_x = self.max_x = x
+        self.active.append(len(self.cells))
+        self.cells.append(cell)
+        self.xs.append(x)
+        self._count(cell, 1)
+
+    def freeze(self, i):
+        """
+        Исключение замороженного блока из обновлений: его клетка больше не меняется.
+
+        Аргументы:
+            i (int): номер блока в списке блоков
+        """
+        self.active.remove(i)
+
+    def refresh(self, blocks):
+        """
+        Обновление индекса после шагов физики. Координаты читаются у всех динамических блоков,
+        но счётчики и высоты пересчитываются только для блоков, сменивших клетку.
+
+        Аргументы:
+            blocks (list): блоки игры в том же порядке, в каком они добавлялись
+        """
+        if not self.dirty:
+            return
+        cells = self.cells
+        xs = self.xs
+        for i in self.active:
+            x, y = blocks[i].position
+            xs[i] = x
+            cell = cell_of(x, y)
+            if cell != cells[i]:
+                self._count(cells[i], -1)
+                self._count(cell, 1)
+                cells[i] = cell
+        if xs:
+            self.min_x = min(xs)
+            self.max_x = max(xs)
+        self.dirty = False
+
+    def _count(self, cell, delta):
+        """
+        Изменение счётчика блоков в клетке и пересчёт высоты её колонки.
+
+        Аргументы:
+            cell (tuple): (колонка, уровень)
+            delta (int): +1 при добавлении блока, -1 при удалении
+        """
+        col, level = cell
+        if level <= 0:
+            self.below += delta
+        if col < 0 or col > COLS - 1:
+            self.fallen += delta
+            return
+        levels = self.levels[col]
+        n = levels.get(level, 0) + delta
+        if n:
+            levels[level] = n
+        else:
+            del levels[level]
+        if delta > 0:
+            self.heights[col] = max(self.heights[col], level)
+        elif not n and level == self.heights[col]:
+            self.heights[col] = max(max(levels, default=0), 0)
@@ -1,26 +1,27 @@
-# Раздел: Настройки и инициализация Pygame
-# Назначение: Определение параметров экрана, блоков и инициализация библиотеки Pygame
+# Раздел: Настройки проекта
+# Назначение: Определение параметров экрана, блоков и игры.
+# Модуль не импортирует Pygame: окно и шрифты создаются в render.py только при визуализации.
+# BLOCK_SIZE и MAX_BLOCKS можно переопределить переменными окружения NIRS_BLOCK_SIZE и NIRS_MAX_BLOCKS
+# (например, для бенчмарков крупных конфигураций); они читаются один раз при импорте.
 
-import pygame as pg
+import os
 
 # --- Настройки экрана и игры ---
 RES = WIDTH, HEIGHT = 900, 900      # Разрешение окна (ширина, высота) в пикселях
 FPS = 150                          # Частота обновления кадров в секунду
 
 # --- Параметры блоков ---
-BLOCK_SIZE = 125                   # Размер одного блока (TODO: уменьшить размер блока)
+BLOCK_SIZE = int(os.environ.get('NIRS_BLOCK_SIZE', 125))  # Размер одного блока (TODO: уменьшить размер блока)
 START_X = WIDTH // 2               # Начальная позиция X (центр экрана)
 START_Y = 30                      # Начальная позиция Y (отступ сверху)
-MAX_BLOCKS = 30                   # Максимальное количество блоков (TODO: увеличить)
+MAX_BLOCKS = int(os.environ.get('NIRS_MAX_BLOCKS', 30))   # Максимальное количество блоков (TODO: увеличить)
 SHOW_EVERY = 100                   # Частота обновления отображения (каждые N кадров)
 COLS = WIDTH // BLOCK_SIZE         # Количество колонок по ширине экрана
 
-# --- Инициализация Pygame ---
-pg.init()                         # Инициализация всех модулей Pygame
+# --- Определение покоя блоков (режим settle) ---
+SETTLE_ENERGY = 5.0                # Порог кинетической энергии блока в покое (m*v^2 + I*w^2, ~2 пикселя в секунду)
+SETTLE_FRAMES = 3                  # Сколько кадров подряд все блоки должны быть в покое
+SETTLE_MAX_STEPS = 130             # Предел шагов физики на одно падение (70 кадров падения + 60 кадров интервала)
 
-surface = pg.display.set_mode(RES)  # Создание окна с заданным разрешением
-pg.display.set_caption("Q-обучение пирамида")  # Заголовок окна
-
-clock = pg.time.Clock()            # Объект для контроля времени и FPS
-
-font = pg.font.Font(None, 28)     # Шрифт для вывода текста (стандартный, размер 28)
\ No newline at end of file
+# --- Заморозка нижних слоёв (режим freeze) ---
+FREEZE_DEPTH = 3                   # Блок замораживается, если над ним в колонке не меньше FREEZE_DEPTH уровней
@@ -0,0 +1,283 @@
+# Раздел: Пакетная оценка жадной политики
+# Назначение: Оценка обученной Q-таблицы без исследования и без обучения: жадная политика один раз
+#   извлекается в плотный массив действий по коду состояния (с запасным действием для незнакомых
+#   состояний), а тысячи безоконных эпизодов прогоняются пакетами независимых игр, при желании -
+#   в нескольких процессах. Физика детерминирована, поэтому различия между эпизодами задаются
+#   зёрнами: смещением точки появления блока (--jitter) и долей случайных действий (--epsilon)
+# Входные данные:
+#   paths - файлы q_table.pkl или контрольных точек (checkpoint.py); несколько файлов оцениваются
+#     на одних и тех же зёрнах и сравниваются попарно
+#   --episodes, --batch, --workers, --seed - объём, размер пакета игр, процессы и зерно
+#   --fallback - действие в незнакомом состоянии: zero (как у QAgent), center или random
+# Выходные данные:
+#   Распределение размещённых блоков и награды, доля обрушений и незнакомых состояний
+#   (таблица в stdout и JSON-строка на файл, дописывается в --output)
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import checkpoint
+from agent import QAgent
+from config import COLS, MAX_BLOCKS
+from game import Game
+from physics import create_space
+from qtable import QTable, LEVELS, encode_state, encode_heights
+
+# Код состояния пустой игры (COLS + 1 нулей) - наибольший код qtable.encode_state
+EMPTY = LEVELS ** COLS
+FALLBACKS = ('zero', 'center', 'random')
+
+
+class FrozenAgent(QAgent):
+    """
+    Агент игр оценки: вычисляет состояния, но не обучается.
+    """
+
+    def learn(self, prev_state, action, reward, next_state, done=False):
+        pass
+
+
+class GreedyPolicy:
+    def __init__(self, q_table, n_actions, max_dense=50_000_000):
+        """
+        Извлечение жадной политики из Q-таблицы:
+            - dense: массив int16 действие по коду состояния qtable.encode_state
+              (-1 - состояние не встречалось), если количество кодов LEVELS ** COLS + 1 не больше max_dense
+            - lookup: словарь для состояний вне плотного массива (или для всех, если массива нет)
+        """
+        table = q_table if isinstance(q_table, QTable) else QTable.from_dict(q_table, n_actions)
+        self.n_actions = n_actions
+        self.dense = np.full(EMPTY + 1, -1, dtype=np.int16) if EMPTY + 1 <= max_dense else None
+        self.lookup = {}
+        for state, action in table.greedy_policy().items():
+            code = encode_state(state) if self.dense is not None else None
+            if code is None:
+                self.lookup[state] = action
+            else:
+                self.dense[code] = action
+
+    def act(self, states):
+        """
+        Векторизованный выбор жадных действий для пакета состояний.
+
+        Аргументы:
+            states (list): состояния
+
+        Возвращает:
+            np.ndarray: индексы действий (-1 - состояние не встречалось в Q-таблице)
+        """
+        actions = np.full(len(states), -1, dtype=np.int64)
+        if self.dense is None:
+            for i, s in enumerate(states):
+                actions[i] = self.lookup.get(s, -1)
+            return actions
+        full = np.array([i for i, s in enumerate(states) if len(s) == COLS], dtype=np.int64)
+        rest = [i for i, s in enumerate(states) if len(s) != COLS]
+        if len(full):
+            codes = encode_heights([states[i] for i in full])
+            ok = codes >= 0
+            actions[full[ok]] = self.dense[codes[ok]]
+            rest += full[~ok].tolist()
+        for i in rest:
+            code = encode_state(states[i])
+            actions[i] = self.dense[code] if code is not None else self.lookup.get(states[i], -1)
+        return actions
+
+
+def evaluate(policy, start, stop, seed=0, batch=64, epsilon=0.0, jitter=0.0, fallback='zero',
+             settle=False, freeze=False):
+    """
+    Прогон эпизодов с номерами start..stop-1 пакетами по batch игр. Случайность эпизода i
+    (смещение блоков, случайные и запасные действия) задаётся зерном (seed, i), поэтому результат
+    не зависит от размера пакета и разбиения по процессам.
+
+    Аргументы:
+        policy (GreedyPolicy): жадная политика
+        start, stop (int): диапазон номеров эпизодов
+        seed (int): зерно оценки
+        batch (int): количество одновременно моделируемых игр
+        epsilon (float): доля случайных действий
+        jitter (float): наибольшее смещение точки появления блока по X (пиксели)
+        fallback (str): действие в незнакомом состоянии (FALLBACKS)
+        settle, freeze (bool): режимы игры (см. Game)
+
+    Возвращает:
+        dict: массивы blocks, rewards, collapsed по эпизодам и количество решений и незнакомых состояний
+    """
+    agent = FrozenAgent()
+    n = stop - start
+    blocks = np.zeros(n, dtype=np.int64)
+    rewards = np.zeros(n, dtype=np.float64)
+    collapsed = np.zeros(n, dtype=bool)
+    decisions = unseen = 0
+
+    games = [Game(space=create_space(), agent=agent, settle=settle, freeze=freeze) for _ in range(min(batch, n))]
+    episodes = list(range(start, start + len(games)))
+    rngs = [np.random.default_rng([seed, i]) for i in episodes]
+    following = start + len(games)
+    while games:
+        states = [g.state() for g in games]
+        actions = policy.act(states)
+        decisions += len(games)
+        for g, a, s, rng in zip(games, actions.tolist(), states, rngs):
+            if a < 0:
+                unseen += 1
+                if fallback == 'random':
+                    a = int(rng.integers(policy.n_actions))
+                else:
+                    a = policy.n_actions // 2 if fallback == 'center' else 0
+            if epsilon and rng.random() < epsilon:
+                a = int(rng.integers(policy.n_actions))
+            block = g.spawn_block(a, s)
+            if jitter:
+                x, y = block.position
+                block.position = x + rng.uniform(-jitter, jitter), y
+            g.fall(block)
+            g.land_block(block)
+            g.idle()
+
+        for k in reversed(range(len(games))):
+            g = games[k]
+            g.check_fallen()
+            # До проверки MAX_BLOCKS эпизод завершается только невалидным или упавшим блоком
+            fell = g.finished
+            if g.placed_blocks >= MAX_BLOCKS:
+                g.finished = True
+            if not g.finished:
+                continue
+            i = episodes[k] - start
+            blocks[i], rewards[i], collapsed[i] = g.placed_blocks, g.get_reward(), fell
+            if following < stop:
+                # Новое пространство на эпизод: при смещённых точках появления сброшенное пространство
+                # pymunk даёт позы, зависящие от предыдущих эпизодов
+                games[k] = Game(space=create_space(), agent=agent, settle=settle, freeze=freeze)
+                episodes[k] = following
+                rngs[k] = np.random.default_rng([seed, following])
+                following += 1
+            else:
+                del games[k], episodes[k], rngs[k]
+    return {'blocks': blocks, 'rewards': rewards, 'collapsed': collapsed, 'decisions': decisions, 'unseen': unseen}
+
+
+def _evaluate_range(args):
+    return evaluate(*args[:3], **args[3])
+
+
+def run(policy, episodes, workers=1, **options):
+    """
+    Оценка episodes эпизодов, при workers > 1 - диапазонами эпизодов в пуле процессов.
+
+    Аргументы:
+        policy (GreedyPolicy): жадная политика
+        episodes (int): количество эпизодов
+        workers (int): количество процессов
+        options: параметры evaluate (seed, batch, epsilon, jitter, fallback, settle, freeze)
+
+    Возвращает:
+        dict: объединённые результаты evaluate
+    """
+    if workers <= 1:
+        return evaluate(policy, 0, episodes, **options)
+    bounds = np.linspace(0, episodes, workers + 1).astype(int)
+    tasks = [(policy, lo, hi, options) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    with mp.Pool(len(tasks)) as pool:
+        parts = pool.map(_evaluate_range, tasks)
+    return {'blocks': np.concatenate([p['blocks'] for p in parts]),
+            'rewards': np.concatenate([p['rewards'] for p in parts]),
+            'collapsed': np.concatenate([p['collapsed'] for p in parts]),
+            'decisions': sum(p['decisions'] for p in parts), 'unseen': sum(p['unseen'] for p in parts)}
+
+
+def summarize(result):
+    """
+    Сводка распределений по эпизодам.
+
+    Аргументы:
+        result (dict): результаты run / evaluate
+
+    Возвращает:
+        dict: среднее, стандартное отклонение и процентили блоков и награды, гистограмма блоков,
+            доли обрушений, эпизодов до MAX_BLOCKS и решений в незнакомых состояниях
+    """
+    blocks, rewards = result['blocks'], result['rewards']
+    q = (5, 25, 50, 75, 95)
+    return {'episodes': len(blocks),
+            'blocks_mean': float(blocks.mean()), 'blocks_std': float(blocks.std()),
+            'blocks_percentiles': dict(zip(map(str, q), np.percentile(blocks, q).tolist())),
+            'blocks_histogram': {str(b): int(c) for b, c in zip(*np.unique(blocks, return_counts=True))},
+            'reward_mean': float(rewards.mean()), 'reward_std': float(rewards.std()),
+            'reward_percentiles': dict(zip(map(str, q), np.percentile(rewards, q).tolist())),
+            'collapse_rate': float(result['collapsed'].mean()),
+            'max_blocks_rate': float((blocks >= MAX_BLOCKS).mean()),
+            'unseen_rate': result['unseen'] / result['decisions'] if result['decisions'] else 0.0}
+
+
+def load_policy(path, n_actions):
+    """
+    Загрузка жадной политики из q_table.pkl или контрольной точки.
+
+    Аргументы:
+        path (str): файл Q-таблицы
+        n_actions (int): количество действий
+
+    Возвращает:
+        GreedyPolicy: жадная политика
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    agent = QAgent(dense=True)
+    with open(path, 'rb') as f:
+        is_checkpoint = f.read(len(checkpoint.MAGIC)) == checkpoint.MAGIC
+    if is_checkpoint:
+        checkpoint.load(path, agent, mmap=True)
+    else:
+        agent.load(path)
+    return GreedyPolicy(agent.q_table, n_actions)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Пакетная оценка жадной политики")
+    parser.add_argument('paths', nargs='*', default=['q_table.pkl'])
+    parser.add_argument('--episodes', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--epsilon', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=2.0)
+    parser.add_argument('--fallback', choices=FALLBACKS, default='zero')
+    parser.add_argument('--settle', action='store_true')
+    parser.add_argument('--freeze', action='store_true')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    n_actions = len(QAgent().actions)
+    options = {'seed': args.seed, 'batch': args.batch, 'epsilon': args.epsilon, 'jitter': args.jitter,
+               'fallback': args.fallback, 'settle': args.settle, 'freeze': args.freeze}
+    results = []
+    for path in args.paths:
+        policy = load_policy(path, n_actions)
+        start = time.perf_counter()
+        result = run(policy, args.episodes, args.workers, **options)
+        elapsed = time.perf_counter() - start
+        summary = {'path': path, **options, **summarize(result), 'seconds': elapsed,
+                   'episodes_per_sec': args.episodes / elapsed}
+        results.append(result)
+        p = summary['blocks_percentiles']
+        print(f"{path}: blocks={summary['blocks_mean']:.2f}±{summary['blocks_std']:.2f} "
+              f"(p5={p['5']:.0f} p50={p['50']:.0f} p95={p['95']:.0f})  reward={summary['reward_mean']:.2f}  "
+              f"collapse={summary['collapse_rate']:.3f}  max_blocks={summary['max_blocks_rate']:.3f}  "
+              f"unseen={summary['unseen_rate']:.3f}  episodes/s={summary['episodes_per_sec']:.1f}")
+        print(json.dumps(summary))
+        if args.output:
+            with open(args.output, 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+
+    # Эпизоды разных таблиц с одним номером используют одно зерно - сравнение попарное
+    base = results[0]['blocks']
+    for path, result in zip(args.paths[1:], results[1:]):
+        diff = result['blocks'] - base
+        se = diff.std(ddof=1) / np.sqrt(len(diff)) if len(diff) > 1 else 0.0
+        print(f"{path} - {args.paths[0]}: blocks {diff.mean():+.3f} ± {1.96 * se:.3f} (95%)")
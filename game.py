@@ -2,53 +2,91 @@
 # Назначение: Реализация логики игры с использованием Q-агента для управления блоками
 # Входные данные:
 #   Используются константы из config (HEIGHT, BLOCK_SIZE, START_Y, MAX_BLOCKS, FPS)
-#   Агент QAgent загружается из внешнего модуля agent
+#   Агент QAgent создаётся из внешнего модуля agent; Q-таблицу загружает точка входа (main.py)
 # Выходные данные:
 #   Методы класса обеспечивают управление блоками, обновление состояния игры, обучение агента и вычисление награды
 
+import pymunk
 from utils import create_block
-from physics import space
-from config import HEIGHT, BLOCK_SIZE, START_Y, MAX_BLOCKS, FPS
+from columns import ColumnIndex
+from physics import space, at_rest, step_until_settled
+from config import HEIGHT, BLOCK_SIZE, START_Y, MAX_BLOCKS, FPS, COLS, FREEZE_DEPTH, SETTLE_ENERGY, \
+    SETTLE_MAX_STEPS
 from agent import QAgent
 
-# Инициализация агента Q-обучения и загрузка Q-таблицы
+# Инициализация агента Q-обучения (Q-таблица загружается в main.py, импорт модуля не читает файлов)
 agent = QAgent()
-agent.load()
 
 class Game:
-    def __init__(self):
+    def __init__(self, space=space, agent=agent, settle=False, freeze=False, cache=None):
         """
         Инициализация игрового состояния:
+            - space: физическое пространство игры (по умолчанию общее из physics)
+            - agent: агент, управляющий блоками (по умолчанию общий агент модуля)
+            - settle: режим определения покоя - физика падения прогоняется до покоя блоков
+              (не более SETTLE_MAX_STEPS шагов на падение вместе с кадрами интервала),
+              а кадры интервала после покоя не моделируются
+            - settled: все блоки в покое после последнего падения (только в режиме settle)
+            - freeze: режим заморозки - блоки в покое, над которыми в колонке не меньше
+              FREEZE_DEPTH уровней, становятся статическими и не участвуют в расчёте физики
+            - frozen: количество замороженных блоков в текущем эпизоде
+            - cache: кэш переходов физики (TransitionCache); при попадании позы блоков
+              восстанавливаются из кэша без прогона физики падения
             - blocks: список текущих блоков в игре
+            - columns: инкрементальный индекс высот колонок и границ блоков по X
             - timer: счётчик кадров для интервала появления блоков
             - interval: интервал между падениями блоков (в кадрах)
+            - fall_frames: количество кадров физики на падение блока
             - placed_blocks: количество размещённых блоков
             - finished: флаг окончания игры
             - prev_state: предыдущее состояние агента (TODO: увеличить размерность состояния)
             - prev_action: предыдущее действие агента
+            - steps: количество шагов физики в текущем эпизоде
+            - drop_steps: количество шагов физики, потраченных на каждое падение эпизода
+            - actions: индексы действий текущего эпизода по порядку (для записи эпизодов)
         """
+        self.space = space
+        self.agent = agent
+        self.settle = settle
+        self.settled = False
+        self.freeze = freeze
+        self.frozen = 0
+        self.cache = cache
+        self._cache_pending = None
+        self._cache_state = None
         self.blocks = []
+        self.columns = ColumnIndex()
         self.timer = 0
         self.interval = 60
+        self.fall_frames = 70
         self.placed_blocks = 0
         self.finished = False
         self.prev_state = agent.get_state(self.blocks)
         self.prev_action = None
+        self.steps = 0
+        self.drop_steps = []
+        self.actions = []
 
     def reset(self):
         """
         Сброс игрового состояния:
             - удаление всех блоков из физического пространства
             - очистка списка блоков
-            - сброс таймера и счётчика размещённых блоков
+            - сброс таймера, счётчиков размещённых блоков и шагов физики, списка действий
             - сброс флага окончания игры
         """
         for b in self.blocks:
-            space.remove(b, *b.shapes)
+            self.space.remove(b, *b.shapes)
         self.blocks.clear()
+        self.columns.clear()
         self.timer = 0
         self.placed_blocks = 0
         self.finished = False
+        self.settled = False
+        self.frozen = 0
+        self.steps = 0
+        self.drop_steps = []
+        self.actions = []
 
     def drop_block(self):
         """
@@ -56,31 +94,161 @@ class Game:
             - получение текущего состояния агента
             - выбор действия (позиции по X) агентом
             - создание блока в выбранной позиции
-            - симуляция падения блока (прогон физики на fall_frames кадров)
+            - симуляция падения блока (прогон физики на fall_frames кадров или до покоя)
             - проверка валидности положения блока
             - обновление списка блоков и счётчика размещённых
             - обучение агента на основе полученной награды
         """
-        self.prev_state = agent.get_state(self.blocks)
-        action_idx = agent.choose_action(self.prev_state)
-        x = agent.actions[action_idx]
+        block = self.spawn_block()
+        self.fall(block)
+        self.land_block(block)
+
+    def spawn_block(self, action_idx=None, state=None):
+        """
+        Первая фаза падения блока: выбор действия и создание блока в выбранной позиции.
+
+        Аргументы:
+            action_idx (int | None): индекс действия (None - действие выбирает агент)
+            state (tuple | None): текущее состояние, если уже вычислено (например, пакетно)
+
+        Возвращает:
+            pymunk.Body: созданный блок
+        """
+        self.prev_state = state if state is not None else self.state()
+        if action_idx is None:
+            action_idx = self.agent.choose_action(self.prev_state)
+        x = self.agent.actions[action_idx]
         y = START_Y
         self.prev_action = action_idx
+        self.actions.append(action_idx)
+        return create_block(x, y, self.space)
+
+    def simulate(self, frames):
+        """
+        Прогон физики пространства игры на заданное количество кадров.
+
+        Аргументы:
+            frames (int): количество шагов по 1 / FPS секунды
+        """
+        step = self.space.step
+        for _ in range(frames):
+            step(1 / FPS)
+        self.steps += frames
+        self.columns.dirty = True
+
+    def fall(self, block):
+        """
+        Прогон физики падения блока: fall_frames кадров или, в режиме settle,
+        до покоя всех блоков. Число потраченных шагов добавляется в drop_steps.
+        Если задан кэш и пара (раскладка, действие) уже встречалась, позы блоков
+        восстанавливаются из кэша, а физика не моделируется (0 шагов). В кэш попадают
+        только падения, после которых все блоки в покое.
 
-        block = create_block(x, y)
-        fall_frames = 70
-        for _ in range(fall_frames):
-            space.step(1 / FPS)
+        Аргументы:
+            block (pymunk.Body): созданный блок (ещё не в списке blocks)
+
+        Возвращает:
+            int: количество шагов физики
+        """
+        cache = self.cache
+        if cache is not None:
+            key = cache.key(self.blocks, self.prev_action)
+            entry = cache.get(key)
+            if entry is not None:
+                poses, self._cache_state = entry
+                cache.restore(self.blocks + [block], poses)
+                self.columns.dirty = True
+                self.settled = True
+                self.drop_steps.append(0)
+                return 0
+        if self.settle:
+            steps, self.settled = step_until_settled(self.space, [block] + self.dynamic_blocks())
+            self.steps += steps
+            self.columns.dirty = True
+        else:
+            steps = self.fall_frames
+            self.simulate(steps)
+        if cache is not None:
+            rest = self.settled if self.settle else at_rest([block] + self.dynamic_blocks())
+            if rest:
+                self._cache_pending = key, cache.poses(self.blocks + [block])
+        self.drop_steps.append(steps)
+        return steps
+
+    def idle(self):
+        """
+        Прогон физики на interval кадров между падениями блоков.
+        В режиме settle кадры не моделируются, если блоки уже в покое, а после падения
+        без покоя прогоняется не больше кадров, чем осталось до SETTLE_MAX_STEPS на это падение.
+        """
+        if not self.settle:
+            self.simulate(self.interval)
+        elif not self.settled:
+            spent = self.drop_steps[-1] if self.drop_steps else 0
+            self.simulate(min(self.interval, max(0, SETTLE_MAX_STEPS - spent)))
+
+    def land_block(self, block):
+        """
+        Последняя фаза падения блока: проверка валидности, учёт блока и обучение агента.
+
+        Аргументы:
+            block (pymunk.Body): упавший блок
+
+        Возвращает:
+            float: награда за размещение блока
+        """
         if self.is_invalid(block):
             self.finished = True
             #space.remove(block, *block.shapes)
             #return
         self.blocks.append(block)
+        self.columns.add(block)
         self.placed_blocks += 1
-        next_state = agent.get_state(self.blocks)
+        if self._cache_state is not None:
+            next_state, self._cache_state = self._cache_state, None
+        else:
+            next_state = self.state()
+        if self._cache_pending is not None:
+            key, poses = self._cache_pending
+            self.cache.put(key, poses, next_state)
+            self._cache_pending = None
         reward = self.get_reward()
 
-        agent.learn(self.prev_state, self.prev_action, reward, next_state)
+        self.agent.learn(self.prev_state, self.prev_action, reward, next_state, self.finished)
+        if self.freeze:
+            self.freeze_buried()
+        return reward
+
+    def dynamic_blocks(self):
+        """
+        Возвращает:
+            list: незамороженные блоки (все блоки, если режим freeze выключен)
+        """
+        if not self.frozen:
+            return self.blocks
+        blocks = self.blocks
+        return [blocks[i] for i in self.columns.active]
+
+    def freeze_buried(self):
+        """
+        Заморозка засыпанных блоков: блок в покое, над которым в его колонке
+        не меньше FREEZE_DEPTH уровней, становится статическим телом.
+        Верхние слои остаются динамическими.
+        """
+        columns = self.columns
+        columns.refresh(self.blocks)
+        heights = columns.heights
+        for i in list(columns.active):
+            col, level = columns.cells[i]
+            if col < 0 or col > COLS - 1 or level > heights[col] - FREEZE_DEPTH:
+                continue
+            block = self.blocks[i]
+            if block.kinetic_energy > SETTLE_ENERGY:
+                continue
+            block.body_type = pymunk.Body.STATIC
+            self.space.reindex_shapes_for_body(block)
+            columns.freeze(i)
+            self.frozen += 1
 
     def update(self):
         """
@@ -101,16 +269,73 @@ class Game:
             else:
                 self.finished = True
 
-        for b in self.blocks:
-            if b.position.y > HEIGHT:
-                self.finished = True
-                break
+        self.check_fallen()
+
+    def check_fallen(self):
+        """
+        Проверка положения блоков на выход за нижнюю границу экрана.
+        Если хотя бы один блок упал, игра завершается.
+        """
+        self.columns.refresh(self.blocks)
+        if self.columns.below:
+            self.finished = True
+
+    def step(self):
+        """
+        Один кадр игры без отрисовки:
+            - обновление игровой логики (update)
+            - шаг физического пространства на 1 / FPS секунды
+              (в режиме settle шаг пропускается, пока блоки в покое)
+        """
+        self.update()
+        if self.settle and self.settled:
+            return
+        self.space.step(1 / FPS)
+        self.steps += 1
+        self.columns.dirty = True
+        if self.settle:
+            self.settled = at_rest(self.dynamic_blocks())
+
+    def advance(self):
+        """
+        Переход сразу к следующему решению агента без покадрового цикла:
+            - при достижении MAX_BLOCKS игра завершается
+            - иначе падение блока, прогон физики интервала (idle)
+              и однократная проверка упавших блоков
+        Соответствует interval кадрам step(), но без обновления таймера
+        и проверки блоков на каждом кадре.
+        """
+        if self.finished:
+            return
+        if self.placed_blocks >= MAX_BLOCKS:
+            self.finished = True
+            return
+        self.drop_block()
+        self.idle()
+        self.check_fallen()
+
+    def state(self):
+        """
+        Состояние агента по индексу колонок за O(COLS); совпадает с QAgent.get_state(self.blocks).
+        Если есть блоки за пределами колонок, состояние зависит от порядка блоков,
+        поэтому оно вычисляется полным проходом через агента.
+
+        Возвращает:
+            tuple: кортеж высот по колонкам
+        """
+        if not self.blocks:
+            return self.agent.get_state(self.blocks)
+        columns = self.columns
+        columns.refresh(self.blocks)
+        if columns.fallen:
+            return self.agent.get_state(self.blocks)
+        return tuple(columns.heights)
 
     def is_invalid(self, block):
         """
         Проверка валидности положения блока:
             - если блоков нет, всегда валидно
-            - вычисляется минимальная и максимальная координата X среди блоков
+            - минимальная и максимальная координата X среди блоков берутся из индекса колонок
             - если новый блок слишком далеко по X от существующих (более 3 BLOCK_SIZE), позиция считается невалидной
             - если блок опустился ниже нижней границы экрана, позиция невалидна
 
@@ -122,10 +347,9 @@ class Game:
         """
         if not self.blocks:
             return False
-        xs = [b.position.x for b in self.blocks]
-        min_x, max_x = min(xs), max(xs)
-        x = block.position.x
-        y = block.position.y
+        self.columns.refresh(self.blocks)
+        min_x, max_x = self.columns.min_x, self.columns.max_x
+        x, y = block.position
         if x - max_x >= 3 * BLOCK_SIZE or min_x - x >= 3 * BLOCK_SIZE:
             return True
         return y > HEIGHT
@@ -147,7 +371,7 @@ class Game:
         reward = 0
 
         is_symmetry = True
-        h = agent.get_state(self.blocks)
+        h = self.state()
         max_ind, max_val = max(enumerate(h), key=lambda x: x[1])
         i = max_ind
         while i > 0:
@@ -1,74 +1,267 @@
 # Раздел: Основной игровой цикл с визуализацией и обучением агента
 # Назначение: Запуск игрового процесса, отображение состояния игры и графика наград с использованием Pygame и Matplotlib
 # Входные данные:
-#   surface, font, clock, FPS, SHOW_EVERY - параметры из config
-#   space, draw_options - физическое пространство и настройки отрисовки из physics
-#   agent, Game - агент Q-обучения и класс игры
+#   --headless - обучение без окна Pygame (Pygame и Matplotlib не импортируются)
+#   --viewer - безоконное обучение с отрисовкой в отдельном процессе по снимкам поз блоков
+#   --viewer-fps N - частота кадров процесса отрисовки
+#   --generations N - количество поколений в безоконном режиме (по умолчанию бесконечно)
+#   --workers N - количество процессов-воркеров для параллельного безоконного обучения
+#   --settle - физика падения прогоняется до покоя блоков, а не фиксированные 70 кадров
+#   --freeze - заморозка засыпанных блоков в статическую геометрию
+#   --cache N - кэш переходов физики на N записей (0 - без кэша)
+#   --replay N - буфер воспроизведения опыта на N переходов (включает --dense; только --headless без --workers)
+#   --replay-batches K - мини-выборок из буфера после каждого падения блока
+#   --checkpoint PATH - файл контрольной точки: загрузка при запуске (в Q-таблицу QTable, как с --dense)
+#     и периодическое сохранение
+#   --checkpoint-every N - период контрольных точек в поколениях
+#   --mmap - отображение значений Q-таблицы из контрольной точки в память при загрузке
+#     (первое новое состояние копирует значения в память, см. checkpoint.load)
+#   --dense - Q-таблица в непрерывном массиве float32 (QTable) вместо словаря
+#   --max-states N - Q-таблица не больше N состояний с вытеснением (BoundedQTable, включает --dense)
+#   --evict POLICY - правило вытеснения ограниченной Q-таблицы (lru, lfu, cold)
+#   --metrics PATH - CSV-журнал метрик эпизодов (пустая строка - только скользящие агрегаты в памяти);
+#     дописывается при продолжении с контрольной точки, иначе начинается заново
+#   --record PATH - запись эпизодов (действия и параметры физики) для replay.py (только с --headless)
+#   --record-best - записывать только эпизоды с новым лучшим результатом
+#   --alpha, --gamma, --epsilon-decay, --min-epsilon - гиперпараметры агента (например, найденные sweep.py)
+#   --seed N - зерно random и np.random (записывается в заголовок записи эпизодов);
+#     с --workers из него и поколения контрольной точки выводятся зёрна воркеров
+#   --profile PATH - профилирование горячего пути со снимками в PATH (по умолчанию NIRS_PROFILE)
+#   --profile-every S - период снимков профилирования в секундах
+#   clock, FPS, SHOW_EVERY - параметры из config и render
+#   Trainer - безоконный тренер с игрой и агентом
 # Выходные данные:
-#   Отрисовка игрового окна и графика наград, сохранение состояния агента при выходе
+#   Отрисовка игрового окна, журнал метрик и график наград, сохранение состояния агента при выходе
 
-import pygame as pg
-import matplotlib.pyplot as plt
-from config import surface, font, clock, FPS, SHOW_EVERY
-from physics import space, draw_options
+import argparse
+import os
+import random
+import numpy as np
+from config import SHOW_EVERY
 from game import agent, Game
+from trainer import Trainer
+from replay_buffer import ReplayBuffer
+from metrics import MetricsLog
+import checkpoint
+import profiler
 
-# Инициализация игры и переменных для статистики
-game = Game()
-generation = 0
-best_score = 0
-episode_rewards = []
 
-while True:
-    # Очистка экрана: белый фон для визуализации каждые SHOW_EVERY поколений, иначе чёрный
-    if generation % SHOW_EVERY == 0:
-        surface.fill(pg.Color('white'))
+def save_all(trainer, checkpointer=None):
+    """
+    Сохранение состояния агента перед выходом: q_table.pkl, сброс журнала метрик на диск и,
+    если задана, контрольная точка с состоянием тренера (после завершения фоновой записи).
+
+    Аргументы:
+        trainer (Trainer | ParallelTrainer): тренер
+        checkpointer (checkpoint.Checkpointer | None): периодические контрольные точки
+    """
+    agent.save()
+    trainer.metrics.flush()
+    if checkpointer is not None:
+        checkpointer.wait()
+        checkpoint.save(checkpointer.path, agent, trainer)
+
+
+def run_headless(trainer, generations=None, checkpointer=None, prof=None):
+    """
+    Безоконное обучение: эпизоды прогоняются подряд без обработки событий,
+    очистки экрана и ограничения частоты кадров. После каждой порции эпизодов
+    выводятся скользящие агрегаты журнала метрик.
+
+    Аргументы:
+        trainer (Trainer | ParallelTrainer): тренер с игрой и агентом
+        generations (int | None): количество поколений (None - до прерывания Ctrl+C)
+        checkpointer (checkpoint.Checkpointer | None): периодические контрольные точки
+        prof (profiler.Profiler | None): профилировщик (снимки после порций эпизодов)
+    """
+    chunk = checkpointer.every if checkpointer is not None else SHOW_EVERY
+    target = trainer.generation + generations if generations is not None else None
+    try:
+        while target is None or trainer.generation < target:
+            trainer.train(chunk if target is None else min(chunk, target - trainer.generation))
+            if checkpointer is not None:
+                checkpointer.maybe_save(agent, trainer)
+            stats = trainer.metrics.rolling()
+            print(f"Gen: {trainer.generation}  Reward: {stats['reward']:.1f}  Blocks: {stats['blocks']:.1f}  "
+                  f"Max: {stats['max_blocks']}  Episodes/s: {stats['episodes_per_sec']:.1f}")
+            if prof is not None:
+                prof.maybe_export(generation=trainer.generation)
+    except KeyboardInterrupt:
+        pass
+    save_all(trainer, checkpointer)
+    print(f"Gen: {trainer.generation}  Best: {trainer.best_score}  Epsilon: {agent.epsilon:.2f}  "
+          f"Steps/drop: {trainer.physics_steps / max(trainer.drops, 1):.1f}")
+
+
+def run_window(trainer, checkpointer=None, prof=None):
+    """
+    Оконный режим: обучение с отрисовкой каждые SHOW_EVERY поколений.
+
+    Аргументы:
+        trainer (Trainer): тренер с игрой и агентом
+        checkpointer (checkpoint.Checkpointer | None): периодические контрольные точки
+        prof (profiler.Profiler | None): профилировщик (снимки после эпизодов)
+    """
+    import pygame as pg
+    from render import clock, draw
+    from physics import space
+
+    game = trainer.game
+    while True:
+        # Обработка событий Pygame (например, закрытие окна)
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                # Сохранение состояния агента перед выходом
+                save_all(trainer, checkpointer)
+                if prof is not None:
+                    prof.export(generation=trainer.generation)
+                pg.quit()
+                if trainer.metrics.path is not None:
+                    from plot_metrics import plot_metrics
+
+                    plot_metrics(trainer.metrics.path)
+                exit()
+
+        # Обновление состояния игры и физики
+        game.step()
+        # Отрисовка физического пространства и информации на экране каждые SHOW_EVERY поколений
+        if trainer.generation % SHOW_EVERY == 0:
+            draw(space, [
+                f"Gen: {trainer.generation}",
+                f"Blocks: {game.placed_blocks}",
+                f"Best: {trainer.best_score}",
+                f"Epsilon: {agent.epsilon:.2f}",
+            ])
+
+        # Контроль частоты кадров
+        clock.tick(10000)
+        # Если игра завершена, обработка результатов эпизода
+        if game.finished:
+            trainer.finish_episode()
+            if checkpointer is not None:
+                checkpointer.maybe_save(agent, trainer)
+            if prof is not None:
+                prof.maybe_export(generation=trainer.generation)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Q-обучение пирамида")
+    parser.add_argument('--headless', action='store_true', help="обучение без окна Pygame")
+    parser.add_argument('--viewer', action='store_true', help="отрисовка в отдельном процессе")
+    parser.add_argument('--viewer-fps', type=int, default=60, help="частота кадров процесса отрисовки")
+    parser.add_argument('--generations', type=int, default=None, help="количество поколений (безоконный режим)")
+    parser.add_argument('--workers', type=int, default=0, help="количество процессов-воркеров (безоконный режим)")
+    parser.add_argument('--settle', action='store_true', help="прогон физики падения до покоя блоков")
+    parser.add_argument('--freeze', action='store_true', help="заморозка засыпанных блоков")
+    parser.add_argument('--cache', type=int, default=0, help="размер кэша переходов физики")
+    parser.add_argument('--dense', action='store_true', help="Q-таблица в непрерывном массиве float32")
+    parser.add_argument('--max-states', type=int, default=0, help="наибольшее количество состояний Q-таблицы")
+    parser.add_argument('--evict', choices=('lru', 'lfu', 'cold'), default='cold', help="правило вытеснения")
+    parser.add_argument('--replay', type=int, default=0, help="ёмкость буфера воспроизведения опыта")
+    parser.add_argument('--replay-batches', type=int, default=1, help="мини-выборок из буфера на падение блока")
+    parser.add_argument('--checkpoint', default=None, help="файл контрольной точки")
+    parser.add_argument('--checkpoint-every', type=int, default=1000, help="период контрольных точек в поколениях")
+    parser.add_argument('--metrics', default='metrics.csv', help="CSV-журнал метрик эпизодов")
+    parser.add_argument('--record', default=None, help="файл записи эпизодов")
+    parser.add_argument('--record-best', action='store_true', help="записывать только новые лучшие эпизоды")
+    parser.add_argument('--alpha', type=float, default=None, help="скорость обучения")
+    parser.add_argument('--gamma', type=float, default=None, help="коэффициент дисконтирования")
+    parser.add_argument('--epsilon-decay', type=float, default=None, help="множитель epsilon за поколение")
+    parser.add_argument('--min-epsilon', type=float, default=None, help="нижняя граница epsilon")
+    parser.add_argument('--seed', type=int, default=None, help="зерно генераторов случайных чисел")
+    parser.add_argument('--profile', default=profiler.ENV_PATH, help="файл снимков профилирования")
+    parser.add_argument('--profile-every', type=float, default=10.0, help="период снимков профилирования (с)")
+    parser.add_argument('--mmap', action='store_true', help="отображение Q-таблицы из контрольной точки в память")
+    args = parser.parse_args()
+    if (args.viewer or args.record) and args.workers:
+        parser.error("--viewer и --record не поддерживаются с --workers: игры воркеров работают в других процессах")
+    if args.record and not (args.headless or args.viewer):
+        parser.error("--record требует --headless: оконный режим проверяет упавшие блоки каждый кадр, "
+                     "а replay.py воспроизводит эпизод от падения к падению")
+    if args.replay and (args.workers or not (args.headless or args.viewer)):
+        parser.error("--replay поддерживается только в однопроцессном режиме --headless: "
+                     "мини-выборки из буфера обрабатывает безоконный Trainer")
+    if args.max_states and args.replay:
+        parser.error("--max-states несовместим с --replay: буфер хранит номера строк Q-таблицы")
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+    # Просмотрщик рисует в своём процессе, сам тренер работает без окна
+    args.headless = args.headless or args.viewer
+
+    if args.dense or args.replay:
+        agent.use_dense_table()
+    if args.max_states:
+        agent.use_bounded_table(args.max_states, args.evict)
+    # Загрузка прогресса: контрольная точка (вместе с epsilon и статистикой) или q_table.pkl
+    meta = {}
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        # Столбцовые массивы контрольной точки загружаются в QTable без строк-массивов на каждое состояние
+        agent.use_dense_table()
+        meta = checkpoint.load(args.checkpoint, agent, mmap=args.mmap)
+    else:
+        agent.load()
+    # Гиперпараметры из командной строки важнее сохранённых в контрольной точке
+    for name in ('alpha', 'gamma', 'epsilon_decay', 'min_epsilon'):
+        if getattr(args, name) is not None:
+            setattr(agent, name, getattr(args, name))
+    checkpointer = checkpoint.Checkpointer(args.checkpoint, args.checkpoint_every) if args.checkpoint else None
+    if args.replay:
+        agent.replay = ReplayBuffer(args.replay)
+    game_options = {'settle': args.settle, 'freeze': args.freeze}
+    if args.cache:
+        from cache import TransitionCache
+
+        game_options['cache'] = TransitionCache(capacity=args.cache)
+    # Номера поколений нового запуска начинаются с 0, поэтому журнал дописывается только при продолжении
+    metrics = MetricsLog(args.metrics or None, append=bool(meta))
+    if args.headless and args.workers:
+        from parallel import ParallelTrainer
+
+        # Зёрна воркеров зависят от поколения контрольной точки: продолжение не повторяет
+        # случайные последовательности первого запуска (без --seed зёрна случайные)
+        seed = None if args.seed is None else [args.seed, meta.get('generation', 0)]
+        trainer = ParallelTrainer(workers=args.workers, seed=seed, metrics=metrics, **game_options)
+    elif args.headless:
+        replay_batches = args.replay_batches if args.replay else 0
+        viewer = None
+        if args.viewer:
+            from viewer import Viewer
+
+            viewer = Viewer(fps=args.viewer_fps)
+        trainer = Trainer(Game(**game_options), replay_batches=replay_batches, metrics=metrics, viewer=viewer)
+    else:
+        trainer = Trainer(Game(**game_options), metrics=metrics)
+    checkpoint.restore_trainer(trainer, meta)
+    if args.record:
+        from recording import EpisodeRecorder
+
+        trainer.recorder = EpisodeRecorder(args.record, trainer.game, args.seed, args.record_best,
+                                           best=trainer.best_score)
+    prof = None
+    if args.profile:
+        prof = profiler.Profiler(args.profile, args.profile_every)
+        # Игры воркеров работают в своих процессах, там замеряется только центральный агент
+        if args.headless and args.workers:
+            prof.instrument_agent(agent)
+        else:
+            prof.instrument(trainer.game)
+    if checkpointer is not None:
+        checkpointer.last = trainer.generation
+
+    if args.headless and args.workers:
+        with trainer:
+            run_headless(trainer, args.generations, checkpointer, prof)
+    elif args.headless:
+        run_headless(trainer, args.generations, checkpointer, prof)
+        if trainer.viewer is not None:
+            trainer.viewer.close()
+        if args.cache:
+            print(f"Cache: {game_options['cache'].stats()}")
     else:
-        surface.fill(pg.Color('black'))
-
-    # Обработка событий Pygame (например, закрытие окна)
-    for event in pg.event.get():
-        if event.type == pg.QUIT:
-            # Сохранение состояния агента перед выходом
-            agent.save()
-            pg.quit()
-
-            # Построение графика наград по поколениям с помощью Matplotlib
-            plt.plot(episode_rewards)
-            plt.xlabel("Generation")
-            plt.ylabel('Reward')
-            plt.title('Training')
-            plt.grid()
-            plt.show()
-            exit()
-
-    # Обновление состояния игры и физики
-    game.update()
-    space.step(1 / FPS)
-    # Отрисовка физического пространства и информации на экране каждые SHOW_EVERY поколений
-    if generation % SHOW_EVERY == 0:
-        space.debug_draw(draw_options(surface))
-
-        surface.blit(font.render(f"Gen: {generation}", True, (255, 0, 255)), (10, 10))
-        surface.blit(font.render(f"Blocks: {game.placed_blocks}", True, (255, 0, 255)), (10, 40))
-        surface.blit(font.render(f"Best: {best_score}", True, (255, 0, 255)), (10, 70))
-        surface.blit(font.render(f"Epsilon: {agent.epsilon:.2f}", True, (255, 0, 255)), (10, 100))
-
-        pg.display.flip()
-
-    # Контроль частоты кадров
-    clock.tick(10000)
-    # Если игра завершена, обработка результатов эпизода
-    if game.finished:
-        r = game.get_reward()
-        episode_rewards.append(r)
-        next_state = agent.get_state(game.blocks)
-        agent.learn(game.prev_state, game.prev_action, r, next_state)
-        best_score = max(best_score, game.placed_blocks)
-        generation += 1
-
-        # Понижение epsilon для уменьшения случайных действий с течением времени
-        agent.decay_epsilon()
-        #pg.time.delay(300)
-        # Сброс состояния игры для следующего эпизода
-        game.reset()
\ No newline at end of file
+        run_window(trainer, checkpointer, prof)
+    if args.max_states:
+        print(f"Q-table: {agent.q_table.stats()}")
+    if prof is not None:
+        prof.export(generation=trainer.generation)
+    metrics.close()
@@ -0,0 +1,86 @@
+# Раздел: Потоковый журнал метрик обучения
+# Назначение: Запись метрик каждого эпизода в буферизованный CSV-файл и скользящие агрегаты
+#   по последним эпизодам в кольцевом буфере фиксированного размера (память не растёт со временем)
+# Входные данные:
+#   path (str | None) - CSV-файл журнала (None - только кольцевой буфер в памяти)
+#   window (int) - количество последних эпизодов для скользящих агрегатов
+#   append (bool) - дописывать существующий файл (иначе журнал начинается заново)
+# Выходные данные:
+#   Строки CSV с полями FIELDS и словарь скользящих агрегатов (rolling)
+
+import os
+import time
+import numpy as np
+
+FIELDS = ('generation', 'reward', 'blocks', 'epsilon', 'steps', 'seconds', 'timestamp')
+
+
+class MetricsLog:
+    def __init__(self, path=None, window=100, flush_every=100, append=True):
+        """
+        Инициализация журнала:
+            - file: CSV-файл, открытый на дозапись при append (продолжение запуска с контрольной точки)
+              или перезаписываемый; заголовок пишется в новый файл
+            - ring: кольцевой буфер window x len(FIELDS) последних записей
+            - count: общее количество записей, flush_every: период сброса буфера файла на диск
+        """
+        self.path = path
+        self.file = None
+        if path is not None:
+            new = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+            self.file = open(path, 'a' if append else 'w', buffering=1 << 16)
+            if new:
+                self.file.write(','.join(FIELDS) + '\n')
+        self.ring = np.zeros((window, len(FIELDS)), dtype=np.float64)
+        self.count = 0
+        self.flush_every = flush_every
+
+    def record(self, generation, reward, blocks, epsilon, steps, seconds):
+        """
+        Запись метрик одного эпизода.
+
+        Аргументы:
+            generation (int): номер поколения
+            reward (float): награда эпизода
+            blocks (int): количество размещённых блоков
+            epsilon (float): коэффициент исследования после эпизода
+            steps (int): количество шагов физики в эпизоде
+            seconds (float): длительность эпизода (секунды)
+        """
+        row = (generation, reward, blocks, epsilon, steps, seconds, time.time())
+        self.ring[self.count % len(self.ring)] = row
+        self.count += 1
+        if self.file is not None:
+            self.file.write(f"{generation},{reward},{blocks},{epsilon:.6f},{steps},{seconds:.6f},{row[-1]:.3f}\n")
+            if self.count % self.flush_every == 0:
+                self.file.flush()
+
+    def rolling(self):
+        """
+        Скользящие агрегаты по последним window эпизодам.
+
+        Возвращает:
+            dict: средние награда, блоки, шаги и длительность, максимум блоков и эпизодов в секунду
+        """
+        n = min(self.count, len(self.ring))
+        if not n:
+            return {}
+        ring = self.ring[:n]
+        i = {field: k for k, field in enumerate(FIELDS)}
+        seconds = ring[:, i['seconds']].sum()
+        return {'episodes': n,
+                'reward': float(ring[:, i['reward']].mean()),
+                'blocks': float(ring[:, i['blocks']].mean()),
+                'max_blocks': int(ring[:, i['blocks']].max()),
+                'steps': float(ring[:, i['steps']].mean()),
+                'seconds': float(ring[:, i['seconds']].mean()),
+                'episodes_per_sec': n / seconds if seconds else 0.0}
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,181 @@
+# Раздел: Параллельные прогоны эпизодов в пуле процессов
+# Назначение: Прогон эпизодов Game в нескольких процессах-воркерах (у каждого своё физическое пространство)
+#   и слияние собранных переходов в центральную Q-таблицу агента-ученика
+# Входные данные:
+#   workers (int) - количество процессов-воркеров
+#   sync_every (int) - количество эпизодов каждого воркера между синхронизациями политики
+# Выходные данные:
+#   Обновлённая Q-таблица центрального агента и статистика обучения (поколение, лучший результат, награды)
+
+import multiprocessing as mp
+import random
+import signal
+import time
+import numpy as np
+from agent import QAgent
+from game import agent as default_agent, Game
+from metrics import MetricsLog
+from physics import create_space
+from trainer import Trainer
+
+
+class RecordingAgent(QAgent):
+    """
+    Агент воркера: обучается локально и записывает каждый переход
+    (prev_state, action, reward, next_state, done) для отправки ученику.
+    """
+
+    def __init__(self, max_states=0, evict_policy='cold'):
+        super().__init__(max_states=max_states, evict_policy=evict_policy)
+        self.transitions = []
+
+    def learn(self, prev_state, action, reward, next_state, done=False):
+        self.transitions.append((prev_state, action, reward, next_state, done))
+        super().learn(prev_state, action, reward, next_state, done)
+
+
+def _worker(conn, seed, game_options, max_states=0, evict_policy='cold'):
+    """
+    Цикл процесса-воркера. Получает из канала (delta, epsilon, episodes):
+    изменённые строки Q-таблицы, текущий epsilon и количество эпизодов,
+    прогоняет эпизоды и отправляет обратно (transitions, episodes, drops), где episodes -
+    кортежи (reward, placed, steps, seconds) по каждому эпизоду.
+    Сообщение None завершает работу.
+
+    Аргументы:
+        conn (multiprocessing.connection.Connection): канал связи с учеником
+        seed (int): зерно генераторов случайных чисел воркера
+        game_options (dict): параметры игр воркера (settle, freeze - см. Game)
+        max_states, evict_policy: ограничение локальной Q-таблицы воркера, как у ученика
+    """
+    # Прерывание Ctrl+C обрабатывает ученик, воркеры завершаются через close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    random.seed(seed)
+    np.random.seed(seed)
+    agent = RecordingAgent(max_states, evict_policy)
+    trainer = Trainer(Game(space=create_space(), agent=agent, **game_options))
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        delta, epsilon, episodes = msg
+        agent.q_table.update(delta)
+        agent.epsilon = epsilon
+        agent.transitions = []
+        results = []
+        trainer.drops = 0
+        for _ in range(episodes):
+            steps = trainer.physics_steps
+            start = time.perf_counter()
+            r = trainer.run_episode()
+            results.append((r, trainer.last_placed, trainer.physics_steps - steps, time.perf_counter() - start))
+        conn.send((agent.transitions, results, trainer.drops))
+    conn.close()
+
+
+class ParallelTrainer:
+    def __init__(self, workers=mp.cpu_count(), sync_every=10, agent=default_agent, seed=0, metrics=None,
+                 **game_options):
+        """
+        Инициализация параллельного тренера:
+            - agent: центральный агент-ученик, в Q-таблицу которого сливаются переходы
+            - sync_every: эпизодов на воркер между синхронизациями политики
+            - seed: зерно воркеров - число, последовательность чисел (например, зерно запуска
+              и поколение продолжаемого обучения) или None (случайные зёрна от ОС); зёрна воркеров
+              выводятся из него через np.random.SeedSequence
+            - game_options: параметры игр воркеров (settle, freeze - см. Game)
+            - generation, best_score, metrics, physics_steps, drops: статистика обучения, как у Trainer
+            - процессы-воркеры с каналами связи (Pipe)
+        """
+        self.agent = agent
+        self.sync_every = sync_every
+        self.generation = 0
+        self.best_score = 0
+        self.metrics = metrics if metrics is not None else MetricsLog()
+        self.physics_steps = 0
+        self.drops = 0
+        self.conns = []
+        self.procs = []
+        seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(workers)]
+        for i in range(workers):
+            parent, child = mp.Pipe()
+            # Ограничение Q-таблицы ученика действует и на локальные таблицы воркеров
+            proc = mp.Process(target=_worker, args=(child, seeds[i], game_options, agent.max_states,
+                                                    agent.evict_policy), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        # Первая синхронизация передаёт воркерам всю текущую Q-таблицу
+        self.delta = {s: q.copy() for s, q in agent.q_table.items()}
+
+    def run_round(self):
+        """
+        Один раунд: каждый воркер прогоняет sync_every эпизодов с текущей политикой,
+        ученик сливает все полученные переходы в центральную Q-таблицу
+        и готовит изменённые строки для следующей синхронизации.
+
+        Возвращает:
+            int: количество завершённых эпизодов
+        """
+        agent = self.agent
+        start = time.perf_counter()
+        for conn in self.conns:
+            conn.send((self.delta, agent.epsilon, self.sync_every))
+
+        touched = set()
+        episodes = 0
+        replies = [conn.recv() for conn in self.conns]
+        # Длительность эпизода в журнале - доля времени раунда по часам: воркеры работают
+        # одновременно, и собственная длительность эпизода воркера занижала бы эпизоды в секунду в N раз
+        seconds = (time.perf_counter() - start) / max(1, sum(len(results) for _, results, _ in replies))
+        for transitions, results, drops in replies:
+            self.drops += drops
+            for prev_state, action, reward, next_state, done in transitions:
+                agent.learn(prev_state, action, reward, next_state, done)
+                touched.add(prev_state)
+                touched.add(next_state)
+            for r, placed, steps, _ in results:
+                self.best_score = max(self.best_score, placed)
+                self.physics_steps += steps
+                agent.decay_epsilon()
+                self.generation += 1
+                self.metrics.record(self.generation, r, placed, agent.epsilon, steps, seconds)
+            episodes += len(results)
+
+        # Следующие состояния без строк (и вытесненные ограниченной таблицей) не рассылаются
+        q_table = agent.q_table
+        self.delta = {s: q_table[s].copy() for s in touched if s in q_table}
+        return episodes
+
+    def train(self, generations):
+        """
+        Обучение агента, пока не будет завершено не меньше generations эпизодов.
+
+        Аргументы:
+            generations (int): количество эпизодов
+        """
+        target = self.generation + generations
+        while self.generation < target:
+            self.run_round()
+
+    def close(self):
+        """
+        Завершение процессов-воркеров. Воркер, не ответивший за 5 секунд
+        (например, при прерывании посреди раунда), останавливается принудительно.
+        """
+        for conn in self.conns:
+            conn.send(None)
+            conn.close()
+        for proc in self.procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self.conns.clear()
+        self.procs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
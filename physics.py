@@ -1,31 +1,79 @@
 # Раздел: Инициализация физического пространства и создание платформы
 # Назначение: Создание пространства с гравитацией и добавление статической платформы
 # Выходные данные:
-#   space (pymunk.Space) - объект физического пространства с добавленной платформой
-#   draw_options (pymunk.pygame_util.DrawOptions) - настройки отрисовки для pygame
+#   create_space (function) - создание независимого пространства со своей платформой
+#   space (pymunk.Space) - общее физическое пространство с добавленной платформой
+#   at_rest, step_until_settled (function) - определение покоя блоков и прогон физики до покоя
+# Настройки отрисовки (draw_options) вынесены в render.py, чтобы модуль работал без Pygame
 
 import pymunk
-import pymunk.pygame_util
-from config import WIDTH, HEIGHT
+from config import WIDTH, HEIGHT, FPS, SETTLE_ENERGY, SETTLE_FRAMES, SETTLE_MAX_STEPS
 
-# Создание физического пространства
-space = pymunk.Space()
 
-# Установка гравитации (ось Y направлена вниз, поэтому положительное значение гравитации вниз)
-space.gravity = 0, 8000
+def create_space():
+    """
+    Создание физического пространства с гравитацией и статической платформой внизу экрана.
+    Каждый вызов возвращает независимое пространство, поэтому несколько эпизодов
+    могут моделироваться одновременно.
 
-# Настройка отрисовки: положительная ось Y направлена вниз (соответствует экранным координатам)
-pymunk.pygame_util.positive_y_is_up = False
+    Возвращает:
+        pymunk.Space: пространство с добавленной платформой
+    """
+    space = pymunk.Space()
 
-# Создание объекта для отрисовки физических объектов в pygame
-draw_options = pymunk.pygame_util.DrawOptions
+    # Установка гравитации (ось Y направлена вниз, поэтому положительное значение гравитации вниз)
+    space.gravity = 0, 8000
 
-# Создание статической платформы (сегмента) внизу экрана
-platform = pymunk.Segment(space.static_body, (0, HEIGHT), (WIDTH, HEIGHT), 1)
+    # Создание статической платформы (сегмента) внизу экрана
+    platform = pymunk.Segment(space.static_body, (0, HEIGHT), (WIDTH, HEIGHT), 1)
 
-# Установка физических свойств платформы
-platform.elasticity = 0.0  # Отсутствие упругости (не отскакивает)
-platform.friction = 1.0    # Коэффициент трения
+    # Установка физических свойств платформы
+    platform.elasticity = 0.0  # Отсутствие упругости (не отскакивает)
+    platform.friction = 1.0    # Коэффициент трения
 
-# Добавление платформы в физическое пространство
-space.add(platform)
\ No newline at end of file
+    # Добавление платформы в физическое пространство
+    space.add(platform)
+    return space
+
+
+def at_rest(bodies):
+    """
+    Проверка покоя: кинетическая энергия каждого тела ниже порога SETTLE_ENERGY.
+    Энергия читается одним вызовом pymunk, что дешевле отдельных проверок скорости и угловой скорости.
+
+    Аргументы:
+        bodies (list): список тел pymunk.Body
+
+    Возвращает:
+        bool: True, если все тела в покое
+    """
+    for b in bodies:
+        if b.kinetic_energy > SETTLE_ENERGY:
+            return False
+    return True
+
+
+def step_until_settled(space, bodies, max_steps=SETTLE_MAX_STEPS):
+    """
+    Прогон физики, пока все тела не будут в покое SETTLE_FRAMES кадров подряд,
+    но не более max_steps шагов.
+
+    Аргументы:
+        space (pymunk.Space): физическое пространство
+        bodies (list): тела, покой которых отслеживается (движущиеся лучше ставить первыми)
+        max_steps (int): предельное количество шагов
+
+    Возвращает:
+        tuple: (steps, settled) - выполненное количество шагов и флаг достигнутого покоя
+    """
+    still = 0
+    for steps in range(1, max_steps + 1):
+        space.step(1 / FPS)
+        still = still + 1 if at_rest(bodies) else 0
+        if still >= SETTLE_FRAMES:
+            return steps, True
+    return max_steps, False
+
+
+# Общее пространство для оконного режима и одиночной игры
+space = create_space()
@@ -0,0 +1,74 @@
+# Раздел: График обучения по журналу метрик
+# Назначение: Офлайн-построение графиков награды и количества блоков по CSV-журналу metrics.MetricsLog
+#   (журнал читается целиком только здесь, во время обучения история в памяти не хранится)
+# Входные данные:
+#   path - CSV-файл журнала метрик (по умолчанию metrics.csv)
+#   --window N - окно скользящего среднего в эпизодах
+# Выходные данные:
+#   Окно Matplotlib с графиками награды и количества блоков по поколениям
+
+import argparse
+import numpy as np
+
+
+def read_metrics(path):
+    """
+    Чтение журнала метрик в структурированный массив.
+
+    Аргументы:
+        path (str): CSV-файл журнала
+
+    Возвращает:
+        np.ndarray: записи с полями metrics.FIELDS
+    """
+    return np.atleast_1d(np.genfromtxt(path, delimiter=',', names=True))
+
+
+def rolling_mean(values, window):
+    """
+    Скользящее среднее по window последним значениям (в начале - по имеющимся).
+
+    Аргументы:
+        values (np.ndarray): значения
+        window (int): окно усреднения
+
+    Возвращает:
+        np.ndarray: сглаженные значения той же длины
+    """
+    csum = np.cumsum(np.insert(values.astype(np.float64), 0, 0.0))
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    return (csum[idx] - csum[lo]) / (idx - lo)
+
+
+def plot_metrics(path='metrics.csv', window=100):
+    """
+    Построение графиков награды и количества блоков с помощью Matplotlib.
+
+    Аргументы:
+        path (str): CSV-файл журнала
+        window (int): окно скользящего среднего
+    """
+    import matplotlib.pyplot as plt
+
+    data = read_metrics(path)
+    fig, (ax_reward, ax_blocks) = plt.subplots(2, 1, sharex=True)
+    ax_reward.plot(data['generation'], data['reward'], alpha=0.3)
+    ax_reward.plot(data['generation'], rolling_mean(data['reward'], window))
+    ax_reward.set_ylabel('Reward')
+    ax_reward.set_title('Training')
+    ax_reward.grid()
+    ax_blocks.plot(data['generation'], data['blocks'], alpha=0.3)
+    ax_blocks.plot(data['generation'], rolling_mean(data['blocks'], window))
+    ax_blocks.set_xlabel("Generation")
+    ax_blocks.set_ylabel('Blocks')
+    ax_blocks.grid()
+    plt.show()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="График обучения по журналу метрик")
+    parser.add_argument('path', nargs='?', default='metrics.csv')
+    parser.add_argument('--window', type=int, default=100)
+    args = parser.parse_args()
+    plot_metrics(args.path, args.window)
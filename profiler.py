@@ -0,0 +1,202 @@
+# Раздел: Встроенное профилирование горячего пути
+# Назначение: Счётчики и таймеры по фазам игрового цикла и агента (Game.update, drop_block, fall,
+#   QAgent.choose_action / learn, шаги физики), промахи Q-таблицы и шаги физики на падение блока
+#   (падение вместе с кадрами интервала до следующего падения).
+#   Включается переменной окружения NIRS_PROFILE или флагом --profile; методы подменяются
+#   версиями с замером только при включении, поэтому выключенное профилирование ничего не стоит
+# Входные данные:
+#   NIRS_PROFILE - файл снимков (JSON-строки); пустое значение или отсутствие - профилирование выключено
+#   every (float) - период записи снимков в секундах
+# Выходные данные:
+#   Profiler - накопители с методами instrument, snapshot и maybe_export
+
+import json
+import os
+import time
+
+ENV_PATH = os.environ.get('NIRS_PROFILE') or None
+
+
+class Profiler:
+    def __init__(self, path=None, every=10.0, exclusive=False):
+        """
+        Инициализация профилировщика:
+            - path: файл снимков (None - снимки только по запросу snapshot)
+            - every: период записи снимков в секундах
+            - exclusive: время фазы без вложенных замеряемых фаз (иначе время включает вложенные фазы)
+            - seconds, calls: время и количество вызовов по фазам
+            - stack: время вложенных замеряемых вызовов для каждого выполняющегося замера
+            - counters: счётчики событий (промахи Q-таблицы, падения, шаги физики падений)
+            - max_drop_steps: наибольшее количество шагов физики на одно падение
+            - agents: профилируемые агенты (размер Q-таблицы входит в снимок)
+        """
+        self.path = path
+        self.every = every
+        self.exclusive = exclusive
+        self.start = self.last_export = time.perf_counter()
+        self.seconds = {}
+        self.calls = {}
+        self.stack = []
+        self.counters = {}
+        self.max_drop_steps = 0
+        self.agents = []
+
+    def wrap(self, obj, name, phase=None):
+        """
+        Подмена метода объекта (атрибутом экземпляра) версией с замером времени.
+
+        Аргументы:
+            obj: объект, метод которого замеряется
+            name (str): имя метода
+            phase (str | None): имя фазы (по умолчанию имя метода)
+        """
+        phase = phase or name
+        func = getattr(obj, name)
+        seconds, calls, stack = self.seconds, self.calls, self.stack
+        seconds.setdefault(phase, 0.0)
+        calls.setdefault(phase, 0)
+        exclusive = self.exclusive
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            stack.append(0.0)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                nested = stack.pop()
+                seconds[phase] += elapsed - nested if exclusive else elapsed
+                calls[phase] += 1
+                if stack:
+                    stack[-1] += elapsed
+
+        setattr(obj, name, timed)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def watch_misses(self, agent, name):
+        """
+        Подсчёт промахов Q-таблицы в методе агента: состояния, добавленные
+        в таблицу за вызов (ensure_state_exists или QTable.row), - промахи. Для QTable считаются
+        выделенные строки (QTable.inserts): в BoundedQTable вытеснение уменьшает размер таблицы.
+
+        Аргументы:
+            agent (QAgent): агент
+            name (str): имя метода (choose_action, learn)
+        """
+        func = getattr(agent, name)
+        counter = 'misses.' + name
+        self.counters.setdefault(counter, 0)
+        counters = self.counters
+
+        def inserted():
+            table = agent.q_table
+            return table.inserts if hasattr(table, 'inserts') else len(table)
+
+        def counted(*args, **kwargs):
+            before = inserted()
+            result = func(*args, **kwargs)
+            counters[counter] += inserted() - before
+            return result
+
+        setattr(agent, name, counted)
+
+    def instrument_agent(self, agent):
+        """
+        Подключение замеров к агенту (повторный вызов для того же агента ничего не делает).
+
+        Аргументы:
+            agent (QAgent): агент
+        """
+        if agent in self.agents:
+            return
+        self.agents.append(agent)
+        for name in ('choose_action', 'learn'):
+            self.watch_misses(agent, name)
+            self.wrap(agent, name)
+
+    def instrument(self, game):
+        """
+        Подключение замеров к игре, её агенту и физическому пространству.
+
+        Аргументы:
+            game (Game): игра
+        """
+        self.instrument_agent(game.agent)
+        self.wrap(game.space, 'step', 'space.step')
+        for name in ('update', 'advance', 'drop_block', 'check_fallen'):
+            self.wrap(game, name)
+        self.wrap(game, 'fall')
+        fall, reset = game.fall, game.reset
+        # Шаги физики падения - прирост game.steps от начала падения до следующего падения
+        # или конца эпизода: вместе с кадрами интервала (idle) и покадровыми шагами окна
+        mark = [None]
+
+        def close_drop():
+            if mark[0] is not None:
+                steps = game.steps - mark[0]
+                self.count('drops')
+                self.count('drop_steps', steps)
+                self.max_drop_steps = max(self.max_drop_steps, steps)
+                mark[0] = None
+
+        def counted_fall(block):
+            close_drop()
+            mark[0] = game.steps
+            return fall(block)
+
+        def counted_reset():
+            close_drop()
+            reset()
+
+        game.fall = counted_fall
+        game.reset = counted_reset
+
+    def snapshot(self):
+        """
+        Снимок накопленных замеров.
+
+        Возвращает:
+            dict: время с начала, фазы (вызовы, секунды, мкс на вызов), счётчики,
+                шаги физики на падение (среднее и максимум), размер Q-таблицы и вытеснения
+        """
+        drops = self.counters.get('drops', 0)
+        return {'elapsed': time.perf_counter() - self.start,
+                'phases': {phase: {'calls': self.calls[phase], 'seconds': self.seconds[phase],
+                                   'us_per_call': 1e6 * self.seconds[phase] / self.calls[phase]
+                                   if self.calls[phase] else 0.0}
+                           for phase in self.seconds},
+                'counters': dict(self.counters),
+                'steps_per_drop': self.counters.get('drop_steps', 0) / drops if drops else 0.0,
+                'max_drop_steps': self.max_drop_steps,
+                'q_table_size': sum(len(agent.q_table) for agent in self.agents),
+                'q_table_evictions': sum(getattr(agent.q_table, 'evictions', 0) for agent in self.agents)}
+
+    def export(self, **extra):
+        """
+        Дозапись снимка JSON-строкой в файл path.
+
+        Аргументы:
+            extra: дополнительные поля снимка (например, номер поколения)
+        """
+        self.last_export = time.perf_counter()
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({**extra, **self.snapshot()}) + '\n')
+
+    def maybe_export(self, **extra):
+        """
+        Запись снимка, если с предыдущей прошло не меньше every секунд.
+
+        Аргументы:
+            extra: дополнительные поля снимка
+
+        Возвращает:
+            bool: True, если снимок записан
+        """
+        if time.perf_counter() - self.last_export < self.every:
+            return False
+        self.export(**extra)
+        return True
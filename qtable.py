@@ -0,0 +1,340 @@
+# Раздел: Q-таблица на непрерывном массиве
+# Назначение: Альтернативное хранилище Q-таблицы - один непрерывный массив float32 (строки - состояния,
+#   столбцы - действия) и компактный хеш-индекс состояние -> номер строки
+# Входные данные:
+#   n_actions (int) - количество действий агента
+#   state (tuple) - состояние агента (кортеж высот по колонкам)
+# Выходные данные:
+#   QTable - объект с интерфейсом словаря (in, [], len, items, update), совместимый с QAgent
+#   BoundedQTable - таблица с ограниченным количеством строк, счётчиками посещений,
+#     временем последнего обращения и вытеснением холодных малоинформативных состояний
+#   encode_state / encode_heights - целочисленное кодирование состояния (для плотных таблиц по коду)
+
+import numpy as np
+from config import HEIGHT, BLOCK_SIZE, COLS
+
+# Количество уровней высоты одной колонки (0 - пустая колонка)
+LEVELS = HEIGHT // BLOCK_SIZE + 2
+
+
+def encode_state(state):
+    """
+    Кодирование состояния целым числом в смешанной системе счисления с основанием LEVELS.
+    Состояние пустой игры (COLS + 1 нулей) получает отдельный код LEVELS ** COLS.
+
+    Аргументы:
+        state (tuple): кортеж высот по колонкам
+
+    Возвращает:
+        int | None: код состояния или None, если высоты не помещаются в LEVELS уровней
+    """
+    if len(state) != COLS:
+        return LEVELS ** COLS if len(state) == COLS + 1 and not any(state) else None
+    code = 0
+    for h in reversed(state):
+        if h < 0 or h >= LEVELS:
+            return None
+        code = code * LEVELS + h
+    return code
+
+
+def encode_heights(heights):
+    """
+    Векторизованное encode_state для матрицы высот.
+
+    Аргументы:
+        heights (np.ndarray): матрица высот размера (n, COLS)
+
+    Возвращает:
+        np.ndarray: коды состояний int64 (-1 - высоты не помещаются в LEVELS уровней)
+    """
+    heights = np.asarray(heights, dtype=np.int64).reshape(-1, COLS)
+    codes = heights @ (LEVELS ** np.arange(COLS, dtype=np.int64))
+    codes[((heights < 0) | (heights >= LEVELS)).any(axis=1)] = -1
+    return codes
+
+
+class QTable:
+    def __init__(self, n_actions, capacity=1024):
+        """
+        Инициализация Q-таблицы:
+            - index: словарь состояние -> номер строки в values
+            - values: массив Q-значений float32 размера (capacity, n_actions),
+              заполнены первые len(index) строк
+            - inserts: количество строк, выделенных row для новых состояний
+        """
+        self.index = {}
+        self.values = np.zeros((capacity, n_actions), dtype=np.float32)
+        self.inserts = 0
+
+    @classmethod
+    def from_dict(cls, q_table, n_actions):
+        """
+        Создание таблицы из словаря состояние -> массив значений (формат q_table.pkl).
+
+        Аргументы:
+            q_table (dict): словарь Q-таблицы
+            n_actions (int): количество действий
+
+        Возвращает:
+            QTable: таблица с теми же значениями
+        """
+        table = cls(n_actions, capacity=max(len(q_table), 1024))
+        for row, (state, q) in enumerate(q_table.items()):
+            table.index[state] = row
+            table.values[row] = q
+        return table
+
+    def to_dict(self):
+        """
+        Преобразование в словарь состояние -> массив значений.
+
+        Возвращает:
+            dict: словарь Q-таблицы
+        """
+        return {state: self.values[row].copy() for state, row in self.index.items()}
+
+    def get(self, state):
+        """
+        Номер строки состояния без выделения новой строки (для чтения значений).
+
+        Аргументы:
+            state (tuple): состояние
+
+        Возвращает:
+            int | None: номер строки в values или None, если состояния нет в таблице
+        """
+        return self.index.get(state)
+
+    def row(self, state):
+        """
+        Номер строки состояния; при отсутствии состояния выделяется нулевая строка.
+
+        Аргументы:
+            state (tuple): состояние
+
+        Возвращает:
+            int: номер строки в values
+        """
+        row = self.index.get(state)
+        if row is None:
+            row = len(self.index)
+            if row == len(self.values):
+                grown = np.zeros((2 * len(self.values), self.values.shape[1]), dtype=np.float32)
+                grown[:row] = self.values
+                self.values = grown
+            self.index[state] = row
+            self.inserts += 1
+        return row
+
+    def greedy_policy(self):
+        """
+        Векторизованное извлечение жадной политики: argmax по всем строкам сразу.
+
+        Возвращает:
+            dict: словарь состояние -> индекс лучшего действия
+        """
+        best = np.argmax(self.values[:len(self.index)], axis=1).tolist()
+        return {state: best[row] for state, row in self.index.items()}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def __getitem__(self, state):
+        # Возвращается представление строки: изменения записываются прямо в values
+        return self.values[self.index[state]]
+
+    def __setitem__(self, state, q):
+        self.values[self.row(state)] = q
+
+    def keys(self):
+        return self.index.keys()
+
+    def items(self):
+        values = self.values
+        return ((state, values[row]) for state, row in self.index.items())
+
+    def update(self, q_table):
+        for state, q in q_table.items():
+            self[state] = q
+
+    def __getstate__(self):
+        # В файл сохраняются только заполненные строки
+        return {'index': self.index, 'values': self.values[:len(self.index)].copy()}
+
+    def __setstate__(self, state):
+        self.index = state['index']
+        self.inserts = 0
+        values = state['values']
+        self.values = np.zeros((max(len(values), 1024), values.shape[1]), dtype=np.float32)
+        self.values[:len(values)] = values
+
+
+class BoundedQTable(QTable):
+    POLICIES = ('lru', 'lfu', 'cold')
+
+    def __init__(self, n_actions, capacity=100000, policy='cold', batch=None):
+        """
+        Инициализация Q-таблицы ограниченного размера (массивы выделяются сразу на capacity строк):
+            - policy: правило вытеснения при заполнении:
+                lru - давно не использованные состояния,
+                lfu - состояния с наименьшим количеством обновлений,
+                cold - из давно не использованной половины таблицы состояния с наименьшим
+                    разбросом значений действий (строка с равными значениями не влияет на выбор действия)
+            - batch: количество строк, вытесняемых за раз (по умолчанию 5% ёмкости)
+            - states: состояние каждой строки (для перестановки строк при вытеснении)
+            - visits: количество обновлений строки, touched: время последнего обращения
+              (логические часы clock - номер обновления)
+            - evictions: количество вытесненных состояний
+        Занятые строки всегда идут подряд с начала values, как в QTable.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"неизвестное правило вытеснения {policy!r}, допустимы: {', '.join(self.POLICIES)}")
+        super().__init__(n_actions, capacity)
+        self.capacity = capacity
+        self.policy = policy
+        self.batch = batch or max(1, capacity // 20)
+        self.states = [None] * capacity
+        self.visits = np.zeros(capacity, dtype=np.uint32)
+        self.touched = np.zeros(capacity, dtype=np.int64)
+        self.clock = 0
+        self.evictions = 0
+
+    @classmethod
+    def bound(cls, table, n_actions, capacity, policy='cold'):
+        """
+        Создание ограниченной таблицы из словаря или QTable. Если состояний больше capacity,
+        остаются состояния с наибольшим разбросом значений действий.
+
+        Аргументы:
+            table (dict | QTable): исходная таблица
+            n_actions (int): количество действий
+            capacity (int): наибольшее количество состояний
+            policy (str): правило вытеснения
+
+        Возвращает:
+            BoundedQTable: таблица с теми же значениями (не больше capacity состояний)
+        """
+        bounded = cls(n_actions, capacity, policy)
+        items = list(table.items())
+        extra = len(items) - capacity
+        if extra > 0:
+            spread = np.array([np.ptp(q) for _, q in items])
+            keep = np.sort(np.argpartition(spread, extra)[extra:])
+            items = [items[i] for i in keep.tolist()]
+        for row, (state, q) in enumerate(items):
+            bounded.index[state] = row
+            bounded.states[row] = state
+            bounded.values[row] = q
+        return bounded
+
+    def get(self, state):
+        row = self.index.get(state)
+        if row is not None:
+            self.touched[row] = self.clock
+        return row
+
+    def row(self, state):
+        """
+        Номер строки обновляемого состояния. Отсутствующее состояние получает нулевую строку;
+        если таблица заполнена, перед этим вытесняются batch состояний.
+
+        Аргументы:
+            state (tuple): состояние
+
+        Возвращает:
+            int: номер строки в values
+        """
+        self.clock += 1
+        row = self.index.get(state)
+        if row is None:
+            if len(self.index) == self.capacity:
+                self.evict(self.batch)
+            row = len(self.index)
+            self.index[state] = row
+            self.inserts += 1
+            self.states[row] = state
+            self.values[row] = 0
+            self.visits[row] = 0
+        self.visits[row] += 1
+        self.touched[row] = self.clock
+        return row
+
+    def victims(self, k):
+        """
+        Выбор строк для вытеснения по правилу policy.
+
+        Аргументы:
+            k (int): количество строк
+
+        Возвращает:
+            np.ndarray: номера строк
+        """
+        n = len(self.index)
+        if self.policy == 'lru':
+            return np.argpartition(self.touched[:n], k - 1)[:k]
+        if self.policy == 'lfu':
+            return np.argpartition(self.visits[:n], k - 1)[:k]
+        half = max(k, n // 2)
+        cold = np.argpartition(self.touched[:n], half - 1)[:half]
+        return cold[np.argpartition(np.ptp(self.values[cold], axis=1), k - 1)[:k]]
+
+    def evict(self, k):
+        """
+        Вытеснение k состояний. Освободившиеся строки заполняются последними строками таблицы,
+        чтобы занятые строки по-прежнему шли подряд.
+
+        Аргументы:
+            k (int): количество состояний
+        """
+        n = len(self.index)
+        k = min(k, n)
+        if not k:
+            return
+        victims = self.victims(k)
+        states = self.states
+        for row in victims.tolist():
+            del self.index[states[row]]
+        removed = np.zeros(n, dtype=bool)
+        removed[victims] = True
+        holes = victims[victims < n - k]
+        movers = np.arange(n - k, n)[~removed[n - k:]]
+        self.values[holes] = self.values[movers]
+        self.visits[holes] = self.visits[movers]
+        self.touched[holes] = self.touched[movers]
+        for hole, mover in zip(holes.tolist(), movers.tolist()):
+            states[hole] = states[mover]
+            self.index[states[hole]] = hole
+        states[n - k:n] = [None] * k
+        self.evictions += k
+
+    def stats(self):
+        """
+        Возвращает:
+            dict: количество состояний, ёмкость, правило, вытеснения и объём массивов в байтах
+        """
+        return {'size': len(self.index), 'capacity': self.capacity, 'policy': self.policy,
+                'evictions': self.evictions,
+                'bytes': self.values.nbytes + self.visits.nbytes + self.touched.nbytes}
+
+    def __getstate__(self):
+        n = len(self.index)
+        return {**super().__getstate__(), 'capacity': self.capacity, 'policy': self.policy, 'batch': self.batch,
+                'visits': self.visits[:n].copy(), 'touched': self.touched[:n].copy(), 'clock': self.clock,
+                'evictions': self.evictions}
+
+    def __setstate__(self, state):
+        values = state['values']
+        self.__init__(values.shape[1], state['capacity'], state['policy'], state['batch'])
+        n = len(values)
+        self.index = state['index']
+        self.values[:n] = values
+        self.visits[:n] = state['visits']
+        self.touched[:n] = state['touched']
+        for s, row in self.index.items():
+            self.states[row] = s
+        self.clock = state['clock']
+        self.evictions = state['evictions']
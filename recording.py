@@ -0,0 +1,155 @@
+# Раздел: Компактная запись эпизодов
+# Назначение: Сохранение эпизодов для последующего детерминированного воспроизведения (replay.py):
+#   последовательность индексов действий упаковывается по ceil(log2(число действий)) бит на шаг,
+#   параметры физики пишутся один раз в строку-заголовок сессии записи
+# Входные данные:
+#   path (str) - файл записей (JSON-строки, дописывается)
+#   game (Game) - игра, параметры физики которой попадают в заголовок
+#   seed (int | None) - зерно генераторов случайных чисел запуска
+#   best_only (bool) - записывать только эпизоды с новым лучшим результатом
+#   best (int) - лучший результат до начала записи (например, из контрольной точки)
+# Выходные данные:
+#   Строка-заголовок {"header": ...} на каждую сессию записи и по строке на эпизод
+#   (поколение, награда, блоки, количество шагов, действия в base64)
+
+import base64
+import json
+import math
+import numpy as np
+
+VERSION = 1
+
+
+def action_bits(n_actions):
+    """
+    Возвращает:
+        int: количество бит на индекс действия (не меньше 1)
+    """
+    return max(1, math.ceil(math.log2(n_actions)))
+
+
+def pack_actions(actions, bits):
+    """
+    Упаковка индексов действий по bits бит подряд (старший бит первым).
+
+    Аргументы:
+        actions (list): индексы действий (меньше 256)
+        bits (int): бит на действие
+
+    Возвращает:
+        bytes: упакованные действия (ceil(len(actions) * bits / 8) байт)
+    """
+    a = np.asarray(actions, dtype=np.uint8).reshape(-1, 1)
+    return np.packbits(np.unpackbits(a, axis=1)[:, 8 - bits:].reshape(-1)).tobytes()
+
+
+def unpack_actions(data, bits, n):
+    """
+    Распаковка n индексов действий, упакованных pack_actions.
+
+    Аргументы:
+        data (bytes): упакованные действия
+        bits (int): бит на действие
+        n (int): количество действий
+
+    Возвращает:
+        list: индексы действий
+    """
+    b = np.unpackbits(np.frombuffer(data, dtype=np.uint8))[:n * bits].reshape(n, bits)
+    return (b.astype(np.int64) << np.arange(bits - 1, -1, -1)).sum(axis=1).tolist()
+
+
+def physics_config(game):
+    """
+    Параметры, от которых зависит ход эпизода при заданных действиях.
+
+    Аргументы:
+        game (Game): игра
+
+    Возвращает:
+        dict: параметры экрана, блоков, физики и режимов игры
+    """
+    # config импортируется при вызове: replay.py читает записи до того, как задаст
+    # NIRS_BLOCK_SIZE / NIRS_MAX_BLOCKS из заголовка и импортирует config
+    from config import WIDTH, HEIGHT, FPS, BLOCK_SIZE, MAX_BLOCKS, SETTLE_ENERGY, SETTLE_FRAMES, \
+        SETTLE_MAX_STEPS, FREEZE_DEPTH
+
+    return {'width': WIDTH, 'height': HEIGHT, 'fps': FPS, 'block_size': BLOCK_SIZE, 'max_blocks': MAX_BLOCKS,
+            'gravity': list(game.space.gravity), 'fall_frames': game.fall_frames, 'interval': game.interval,
+            'settle': game.settle, 'freeze': game.freeze, 'cache': game.cache is not None,
+            'settle_energy': SETTLE_ENERGY, 'settle_frames': SETTLE_FRAMES, 'settle_max_steps': SETTLE_MAX_STEPS,
+            'freeze_depth': FREEZE_DEPTH, 'actions': len(game.agent.actions)}
+
+
+def read(path):
+    """
+    Чтение файла записей.
+
+    Аргументы:
+        path (str): файл записей
+
+    Возвращает:
+        list: эпизоды - словари полей строки эпизода с добавленными header (заголовок сессии)
+            и actions (распакованные индексы действий)
+    """
+    episodes = []
+    header = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'header' in entry:
+                header = entry['header']
+                continue
+            data = base64.b64decode(entry['actions'])
+            entry['actions'] = unpack_actions(data, header['bits'], entry['steps'])
+            entry['header'] = header
+            episodes.append(entry)
+    return episodes
+
+
+class EpisodeRecorder:
+    def __init__(self, path, game, seed=None, best_only=False, best=0):
+        """
+        Начало сессии записи: в файл дописывается заголовок с параметрами физики.
+            - bits: бит на индекс действия
+            - best_only, best: запись только эпизодов лучше best (лучший результат записи
+              или продолженного с контрольной точки обучения)
+            - recorded: количество записанных эпизодов
+        """
+        self.path = path
+        self.best_only = best_only
+        self.best = best
+        self.recorded = 0
+        config = physics_config(game)
+        self.bits = action_bits(config['actions'])
+        self.file = open(path, 'a')
+        header = {'version': VERSION, 'seed': seed, 'bits': self.bits, 'config': config}
+        self.file.write(json.dumps({'header': header}) + '\n')
+        self.file.flush()
+
+    def record(self, generation, game, reward):
+        """
+        Запись завершённого эпизода (до сброса игры).
+
+        Аргументы:
+            generation (int): номер поколения
+            game (Game): игра с действиями эпизода
+            reward (float): награда эпизода
+
+        Возвращает:
+            bool: True, если эпизод записан
+        """
+        if self.best_only and game.placed_blocks <= self.best:
+            return False
+        self.best = max(self.best, game.placed_blocks)
+        data = base64.b64encode(pack_actions(game.actions, self.bits)).decode()
+        self.file.write(json.dumps({'generation': generation, 'reward': reward, 'blocks': game.placed_blocks,
+                                    'steps': len(game.actions), 'actions': data}) + '\n')
+        self.file.flush()
+        self.recorded += 1
+        return True
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,66 @@
+# Раздел: Инициализация Pygame и отрисовка
+# Назначение: Необязательный слой визуализации поверх безоконного ядра (game, physics, agent).
+#   Импорт модуля открывает окно, поэтому его подключает только оконный режим main.py.
+# Выходные данные:
+#   surface, clock, font - окно, таймер кадров и шрифт Pygame
+#   draw_options (pymunk.pygame_util.DrawOptions) - настройки отрисовки для pygame
+#   draw (function) - отрисовка физического пространства и статистики
+#   draw_poses (function) - отрисовка блоков по массиву поз (без физического пространства)
+
+import math
+import pygame as pg
+import pymunk.pygame_util
+from config import RES, WIDTH, HEIGHT, BLOCK_SIZE
+
+# --- Инициализация Pygame ---
+pg.init()                         # Инициализация всех модулей Pygame
+
+surface = pg.display.set_mode(RES)  # Создание окна с заданным разрешением
+pg.display.set_caption("Q-обучение пирамида")  # Заголовок окна
+
+clock = pg.time.Clock()            # Объект для контроля времени и FPS
+
+font = pg.font.Font(None, 28)     # Шрифт для вывода текста (стандартный, размер 28)
+
+# Настройка отрисовки: положительная ось Y направлена вниз (соответствует экранным координатам)
+pymunk.pygame_util.positive_y_is_up = False
+
+# Создание объекта для отрисовки физических объектов в pygame
+draw_options = pymunk.pygame_util.DrawOptions
+
+
+def draw(space, lines):
+    """
+    Отрисовка кадра: очистка экрана, физическое пространство и строки статистики.
+
+    Аргументы:
+        space (pymunk.Space): физическое пространство для отрисовки
+        lines (list): строки статистики, выводимые в левом верхнем углу
+    """
+    surface.fill(pg.Color('white'))
+    space.debug_draw(draw_options(surface))
+    for i, line in enumerate(lines):
+        surface.blit(font.render(line, True, (255, 0, 255)), (10, 10 + 30 * i))
+    pg.display.flip()
+
+
+def draw_poses(poses, lines):
+    """
+    Отрисовка кадра по позам блоков: платформа, блоки-квадраты BLOCK_SIZE и строки статистики.
+    Используется процессами, у которых нет физического пространства (viewer).
+
+    Аргументы:
+        poses (np.ndarray): массив n x 3 поз блоков (x, y, angle)
+        lines (list): строки статистики, выводимые в левом верхнем углу
+    """
+    surface.fill(pg.Color('white'))
+    pg.draw.line(surface, (0, 0, 0), (0, HEIGHT - 1), (WIDTH, HEIGHT - 1), 2)
+    half = BLOCK_SIZE / 2
+    for x, y, angle in poses:
+        c, s = math.cos(angle) * half, math.sin(angle) * half
+        corners = [(x + c * dx - s * dy, y + s * dx + c * dy) for dx, dy in ((-1, -1), (1, -1), (1, 1), (-1, 1))]
+        pg.draw.polygon(surface, (244, 193, 193), corners)
+        pg.draw.polygon(surface, (0, 0, 0), corners, 1)
+    for i, line in enumerate(lines):
+        surface.blit(font.render(line, True, (255, 0, 255)), (10, 10 + 30 * i))
+    pg.display.flip()
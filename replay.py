@@ -0,0 +1,146 @@
+# Раздел: Детерминированное воспроизведение записанных эпизодов
+# Назначение: Восстановление сцены pymunk по записи эпизода (recording.py) в новом физическом
+#   пространстве: те же действия и параметры физики дают те же позы блоков. Без флагов отрисовки
+#   эпизод воспроизводится без окна и сверяется с записанными блоками и наградой
+# Входные данные:
+#   path - файл записей
+#   --index N / --generation G / --best - выбор эпизода (по умолчанию последний записанный)
+#   --list - вывести список записанных эпизодов
+#   --show - отрисовка в окне Pygame, --fps - частота кадров окна
+#   --frames DIR - экспорт кадров PNG (без дисплея - драйвер dummy), --every K - каждый K-й кадр физики
+# Выходные данные:
+#   Результат сверки в stdout (и JSON-строка), окно с воспроизведением или каталог кадров
+
+import argparse
+import json
+import os
+import sys
+from recording import read
+
+
+def select(episodes, args):
+    """
+    Выбор эпизода по аргументам командной строки.
+
+    Аргументы:
+        episodes (list): эпизоды из recording.read
+        args (argparse.Namespace): аргументы (index, generation, best)
+
+    Возвращает:
+        dict: выбранный эпизод
+    """
+    if args.best:
+        return max(episodes, key=lambda e: e['blocks'])
+    if args.generation is not None:
+        for e in episodes:
+            if e['generation'] == args.generation:
+                return e
+        sys.exit(f"Эпизод поколения {args.generation} не записан")
+    return episodes[args.index]
+
+
+def replay(episode, show=False, frames=None, every=1, fps=None):
+    """
+    Воспроизведение эпизода в новом физическом пространстве. Должно вызываться после того,
+    как NIRS_BLOCK_SIZE / NIRS_MAX_BLOCKS заданы из заголовка записи (config читает их при импорте).
+
+    Аргументы:
+        episode (dict): эпизод из recording.read
+        show (bool): отрисовка в окне Pygame
+        frames (str | None): каталог для экспорта кадров PNG
+        every (int): отрисовывать каждый every-й кадр физики
+        fps (int | None): частота кадров окна (None - без ограничения)
+
+    Возвращает:
+        dict: результат сверки (блоки и награда записи и воспроизведения, совпадение)
+    """
+    from agent import QAgent
+    from game import Game
+    from physics import create_space
+    from recording import physics_config
+
+    config = episode['header']['config']
+    space = create_space()
+    space.gravity = config['gravity']
+    # Отдельный агент: обучение при воспроизведении не затрагивает сохранённую Q-таблицу
+    game = Game(space=space, agent=QAgent(), settle=config['settle'], freeze=config['freeze'])
+    game.fall_frames = config['fall_frames']
+    game.interval = config['interval']
+    current = physics_config(game)
+    differ = sorted(k for k in config if k != 'cache' and config[k] != current.get(k))
+    if differ:
+        print(f"Внимание: параметры отличаются от записи: {', '.join(differ)}", file=sys.stderr)
+    if config['cache']:
+        print("Внимание: эпизод записан с кэшем переходов, позы могут отличаться", file=sys.stderr)
+
+    if show or frames:
+        if not show:
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        import pygame as pg
+        import render
+
+        if frames:
+            os.makedirs(frames, exist_ok=True)
+        step = space.step
+        count = [0, 0]
+
+        def drawn_step(dt):
+            step(dt)
+            count[0] += 1
+            if count[0] % every:
+                return
+            render.draw(space, [f"Gen: {episode['generation']}", f"Blocks: {game.placed_blocks}"])
+            if frames:
+                pg.image.save(render.surface, os.path.join(frames, f"frame_{count[1]:05d}.png"))
+                count[1] += 1
+            if show:
+                pg.event.pump()
+                if fps:
+                    render.clock.tick(fps)
+
+        space.step = drawn_step
+
+    for action in episode['actions']:
+        block = game.spawn_block(action)
+        game.fall(block)
+        game.land_block(block)
+        game.idle()
+        game.check_fallen()
+    reward = game.get_reward()
+    return {'generation': episode['generation'], 'steps': len(episode['actions']),
+            'blocks': game.placed_blocks, 'recorded_blocks': episode['blocks'],
+            'reward': reward, 'recorded_reward': episode['reward'],
+            'match': game.placed_blocks == episode['blocks'] and reward == episode['reward']}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Воспроизведение записанного эпизода")
+    parser.add_argument('path')
+    parser.add_argument('--index', type=int, default=-1)
+    parser.add_argument('--generation', type=int, default=None)
+    parser.add_argument('--best', action='store_true')
+    parser.add_argument('--list', action='store_true')
+    parser.add_argument('--show', action='store_true')
+    parser.add_argument('--fps', type=int, default=None)
+    parser.add_argument('--frames', default=None)
+    parser.add_argument('--every', type=int, default=1)
+    args = parser.parse_args()
+
+    episodes = read(args.path)
+    if not episodes:
+        sys.exit(f"{args.path}: нет записанных эпизодов")
+    if args.list:
+        for i, e in enumerate(episodes):
+            print(f"{i:5d}  gen={e['generation']:8d}  blocks={e['blocks']:4d}  reward={e['reward']:6}  "
+                  f"steps={e['steps']:4d}")
+        sys.exit()
+
+    episode = select(episodes, args)
+    config = episode['header']['config']
+    os.environ['NIRS_BLOCK_SIZE'] = str(config['block_size'])
+    os.environ['NIRS_MAX_BLOCKS'] = str(config['max_blocks'])
+    result = replay(episode, args.show, args.frames, args.every, args.fps)
+    print(f"Gen: {result['generation']}  Blocks: {result['blocks']} (записано {result['recorded_blocks']})  "
+          f"Reward: {result['reward']} (записано {result['recorded_reward']})  "
+          f"{'совпадает' if result['match'] else 'НЕ СОВПАДАЕТ'}")
+    print(json.dumps(result))
@@ -0,0 +1,64 @@
+# Раздел: Буфер воспроизведения опыта
+# Назначение: Хранение переходов фиксированной ёмкости в массивах NumPy для повторного обучения
+#   на случайных мини-выборках (каждый переход моделирования физики используется многократно)
+# Входные данные:
+#   capacity (int) - максимальное количество переходов (старые перезаписываются по кругу)
+#   Состояния кодируются номерами строк Q-таблицы QTable
+# Выходные данные:
+#   ReplayBuffer - буфер с методами push и sample
+
+import numpy as np
+
+
+class ReplayBuffer:
+    def __init__(self, capacity=100000):
+        """
+        Инициализация буфера:
+            - states, next_states: номера строк состояний в QTable
+            - actions, rewards, dones: действия, награды и флаги завершения эпизода
+            - size: количество заполненных записей, pos: позиция следующей записи
+        """
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.pos = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state, action, reward, next_state, done):
+        """
+        Добавление перехода; при заполнении перезаписывается самый старый.
+
+        Аргументы:
+            state (int): строка предыдущего состояния в QTable
+            action (int): выполненное действие
+            reward (float): полученная награда
+            next_state (int): строка нового состояния в QTable
+            done (bool): переход завершил эпизод
+        """
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Случайная мини-выборка переходов (с возвращением).
+
+        Аргументы:
+            batch_size (int): размер выборки
+
+        Возвращает:
+            tuple: массивы (states, actions, rewards, next_states, dones)
+        """
+        idx = np.random.randint(0, self.size, size=batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
@@ -0,0 +1,184 @@
+# Раздел: Параллельный перебор гиперпараметров
+# Назначение: Перебор alpha, gamma, epsilon_decay и BLOCK_SIZE / MAX_BLOCKS по сетке или случайным
+#   поиском: безоконные прогоны обучения распределяются по пулу процессов с бюджетом эпизодов и времени
+#   на задачу и ранней остановкой явно плохих конфигураций; результаты дописываются в один файл
+# Входные данные:
+#   --alpha, --gamma, --epsilon-decay, --block-size, --max-blocks - значения параметров (для случайного
+#     поиска числовые параметры равномерно выбираются между наименьшим и наибольшим значением,
+#     BLOCK_SIZE и MAX_BLOCKS - из списка)
+#   --random N - случайный поиск из N конфигураций вместо полной сетки
+#   --jobs - количество процессов пула, --episodes / --seconds - бюджет задачи
+#   --check-every, --grace, --stop-ratio - проверка ранней остановки: после grace эпизодов задача
+#     останавливается, если её оценка ниже stop-ratio от лучшей оценки среди всех задач
+#     после того же количества эпизодов обучения
+#   --eval-episodes - жадных эпизодов (epsilon = 0, без обучения) для итоговой оценки политики
+#   --eval-jitter - наибольшее смещение точки появления блока в оценочных эпизодах (пиксели, с зерном задачи)
+#   --output - файл JSON-строк с результатами (дописывается по мере завершения задач)
+# Выходные данные:
+#   Строка на задачу в stdout и файле результатов, лучшие конфигурации в конце
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+
+PARAMS = ('alpha', 'gamma', 'epsilon_decay', 'block_size', 'max_blocks')
+
+# Лучшие оценки среди задач пула по номеру проверки (generation // check_every - 1),
+# задаются инициализатором процессов: задачи сравниваются при одинаковом количестве эпизодов обучения
+_best_at = None
+
+
+def grid(space):
+    """
+    Полная сетка конфигураций.
+
+    Аргументы:
+        space (dict): параметр -> список значений
+
+    Возвращает:
+        list: словари конфигураций
+    """
+    return [dict(zip(PARAMS, values)) for values in itertools.product(*(space[p] for p in PARAMS))]
+
+
+def sample(space, n, rng):
+    """
+    Случайные конфигурации: числовые параметры агента равномерно между крайними значениями,
+    BLOCK_SIZE и MAX_BLOCKS - из списков.
+
+    Аргументы:
+        space (dict): параметр -> список значений
+        n (int): количество конфигураций
+        rng (random.Random): генератор случайных чисел
+
+    Возвращает:
+        list: словари конфигураций
+    """
+    configs = []
+    for _ in range(n):
+        config = {p: rng.uniform(min(space[p]), max(space[p])) for p in ('alpha', 'gamma', 'epsilon_decay')}
+        config.update({p: rng.choice(space[p]) for p in ('block_size', 'max_blocks')})
+        configs.append(config)
+    return configs
+
+
+def _init(best_at):
+    global _best_at
+    _best_at = best_at
+
+
+def run_job(job):
+    """
+    Задача пула: обучение с заданными параметрами в отдельном процессе (пул создаёт
+    новый процесс на каждую задачу, поэтому config импортируется с BLOCK_SIZE / MAX_BLOCKS задачи).
+
+    Аргументы:
+        job (dict): номер задачи, конфигурация, зерно и параметры бюджета и остановки
+
+    Возвращает:
+        dict: конфигурация и результаты (статус, эпизоды, время, оценка, жадная оценка)
+    """
+    config = job['config']
+    os.environ['NIRS_BLOCK_SIZE'] = str(config['block_size'])
+    os.environ['NIRS_MAX_BLOCKS'] = str(config['max_blocks'])
+    import numpy as np
+    from agent import QAgent
+    from config import MAX_BLOCKS
+    from evaluate import GreedyPolicy, evaluate
+    from game import Game
+    from physics import create_space
+    from trainer import Trainer
+
+    random.seed(job['seed'])
+    np.random.seed(job['seed'])
+    agent = QAgent(alpha=config['alpha'], gamma=config['gamma'], epsilon_decay=config['epsilon_decay'])
+    trainer = Trainer(Game(space=create_space(), agent=agent))
+
+    start = time.perf_counter()
+    status = 'done'
+    score = 0.0
+    while trainer.generation < job['episodes']:
+        # Бюджет времени проверяется после каждого эпизода: порция check_every эпизодов
+        # при большом MAX_BLOCKS может идти намного дольше бюджета
+        if time.perf_counter() - start >= job['seconds']:
+            status = 'timeout'
+            break
+        trainer.run_episode()
+        # Оценка - средняя доля размещённых блоков от MAX_BLOCKS по скользящему окну
+        score = trainer.metrics.rolling()['blocks'] / MAX_BLOCKS
+        if trainer.generation % job['check_every']:
+            continue
+        # Сравнение с лучшей оценкой задач на той же проверке, а не с задачами,
+        # которые успели обучиться дольше (с меньшим epsilon)
+        k = trainer.generation // job['check_every'] - 1
+        with _best_at.get_lock():
+            best = _best_at[k] = max(_best_at[k], score)
+        if trainer.generation >= job['grace'] and score < job['stop_ratio'] * best:
+            status = 'stopped'
+            break
+    seconds = time.perf_counter() - start
+
+    # Жадная оценка политики без обучения (evaluate.FrozenAgent); эпизоды различаются
+    # смещением точки появления блоков с зерном задачи, так как физика детерминирована
+    blocks = []
+    if job['eval_episodes']:
+        policy = GreedyPolicy(agent.q_table, len(agent.actions))
+        blocks = evaluate(policy, 0, job['eval_episodes'], seed=job['seed'], jitter=job['eval_jitter'])['blocks']
+    stats = trainer.metrics.rolling()
+    return {'job': job['job'], **config, 'seed': job['seed'], 'status': status,
+            'episodes': trainer.generation, 'seconds': seconds,
+            'episodes_per_sec': trainer.generation / seconds if seconds else 0.0,
+            'score': score, 'reward': stats['reward'], 'blocks': stats['blocks'],
+            'eval_blocks': float(np.mean(blocks)) if len(blocks) else None, 'q_states': len(agent.q_table)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Перебор гиперпараметров")
+    parser.add_argument('--alpha', type=float, nargs='+', default=[0.05, 0.1, 0.2])
+    parser.add_argument('--gamma', type=float, nargs='+', default=[0.9, 0.95, 0.99])
+    parser.add_argument('--epsilon-decay', type=float, nargs='+', default=[0.999, 0.9999])
+    parser.add_argument('--block-size', type=int, nargs='+', default=[125])
+    parser.add_argument('--max-blocks', type=int, nargs='+', default=[30])
+    parser.add_argument('--random', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=mp.cpu_count())
+    parser.add_argument('--episodes', type=int, default=5000)
+    parser.add_argument('--seconds', type=float, default=600.0)
+    parser.add_argument('--check-every', type=int, default=250)
+    parser.add_argument('--grace', type=int, default=1000)
+    parser.add_argument('--stop-ratio', type=float, default=0.5)
+    parser.add_argument('--eval-episodes', type=int, default=20)
+    parser.add_argument('--eval-jitter', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='sweep.jsonl')
+    args = parser.parse_args()
+
+    space = {p: getattr(args, p) for p in PARAMS}
+    configs = sample(space, args.random, random.Random(args.seed)) if args.random else grid(space)
+    jobs = [{'job': i, 'config': config, 'seed': args.seed + i, 'episodes': args.episodes,
+             'seconds': args.seconds, 'check_every': args.check_every, 'grace': args.grace,
+             'stop_ratio': args.stop_ratio, 'eval_episodes': args.eval_episodes,
+             'eval_jitter': args.eval_jitter}
+            for i, config in enumerate(configs)]
+    print(f"{len(jobs)} конфигураций, {args.jobs} процессов")
+
+    ctx = mp.get_context('spawn')
+    best_at = ctx.Array('d', max(1, args.episodes // args.check_every))
+    results = []
+    with ctx.Pool(args.jobs, initializer=_init, initargs=(best_at,), maxtasksperchild=1) as pool, \
+            open(args.output, 'a') as out:
+        for r in pool.imap_unordered(run_job, jobs):
+            results.append(r)
+            out.write(json.dumps(r) + '\n')
+            out.flush()
+            print(f"job={r['job']:4d}  alpha={r['alpha']:.3f}  gamma={r['gamma']:.3f}  "
+                  f"decay={r['epsilon_decay']:.5f}  block={r['block_size']:4d}  max={r['max_blocks']:4d}  "
+                  f"{r['status']:7}  episodes={r['episodes']:6d}  score={r['score']:.3f}  "
+                  f"eval_blocks={r['eval_blocks']}")
+
+    print("Лучшие конфигурации:")
+    for r in sorted(results, key=lambda r: r['score'], reverse=True)[:5]:
+        print(json.dumps(r))
@@ -0,0 +1,105 @@
+# Раздел: Безоконное обучение агента
+# Назначение: Прогон эпизодов Game без Pygame и Matplotlib с максимальной скоростью CPU
+# Входные данные:
+#   game (Game) - игра, эпизоды которой прогоняются (по умолчанию создаётся новая)
+# Выходные данные:
+#   Статистика обучения (поколение, лучший результат, журнал метрик эпизодов) и обновлённая Q-таблица агента
+
+import time
+from game import Game
+from metrics import MetricsLog
+
+
+class Trainer:
+    def __init__(self, game=None, fast_forward=True, replay_batches=0, batch_size=32, metrics=None,
+                 viewer=None, recorder=None):
+        """
+        Инициализация тренера:
+            - game: игра, в которой обучается агент
+            - fast_forward: прогон эпизода от решения к решению (Game.advance)
+              вместо покадрового цикла (Game.step)
+            - replay_batches, batch_size: количество и размер мини-выборок из буфера
+              воспроизведения агента после каждого шага эпизода (0 - без повторного обучения)
+            - generation: номер текущего поколения (эпизода)
+            - best_score: лучшее количество размещённых блоков
+            - last_placed: количество блоков, размещённых в последнем эпизоде
+            - metrics: журнал метрик эпизодов (по умолчанию только скользящие агрегаты в памяти)
+            - physics_steps, drops: суммарное количество шагов физики и падений блоков
+            - viewer: просмотрщик в отдельном процессе (viewer.Viewer), которому
+              после каждого шага эпизода публикуются позы блоков
+            - recorder: запись завершённых эпизодов (recording.EpisodeRecorder)
+        """
+        self.game = game if game is not None else Game()
+        self.fast_forward = fast_forward
+        self.replay_batches = replay_batches
+        self.batch_size = batch_size
+        self.generation = 0
+        self.best_score = 0
+        self.last_placed = 0
+        self.metrics = metrics if metrics is not None else MetricsLog()
+        self.physics_steps = 0
+        self.drops = 0
+        self.viewer = viewer
+        self.recorder = recorder
+        self.episode_start = time.perf_counter()
+
+    def finish_episode(self):
+        """
+        Обработка завершённого эпизода:
+            - финальное обучение агента на награде эпизода
+            - обновление статистики, понижение epsilon, запись метрик и самого эпизода
+            - сброс игры для следующего эпизода
+
+        Возвращает:
+            float: награда эпизода
+        """
+        game = self.game
+        agent = game.agent
+        r = game.get_reward()
+        next_state = game.state()
+        agent.learn(game.prev_state, game.prev_action, r, next_state, True)
+        self.last_placed = game.placed_blocks
+        self.physics_steps += game.steps
+        self.drops += len(game.drop_steps)
+        self.best_score = max(self.best_score, game.placed_blocks)
+        self.generation += 1
+        if self.recorder is not None:
+            self.recorder.record(self.generation, game, r)
+
+        # Понижение epsilon для уменьшения случайных действий с течением времени
+        agent.decay_epsilon()
+        now = time.perf_counter()
+        self.metrics.record(self.generation, r, game.placed_blocks, agent.epsilon, game.steps, now - self.episode_start)
+        self.episode_start = now
+        game.reset()
+        return r
+
+    def run_episode(self):
+        """
+        Прогон одного эпизода без отрисовки и ограничения FPS: от падения к падению
+        в режиме fast_forward, иначе кадр за кадром.
+
+        Возвращает:
+            float: награда эпизода
+        """
+        game = self.game
+        advance = game.advance if self.fast_forward else game.step
+        learn_batch = game.agent.learn_batch
+        viewer = self.viewer
+        while not game.finished:
+            advance()
+            for _ in range(self.replay_batches):
+                learn_batch(self.batch_size)
+            if viewer is not None:
+                viewer.publish(game, self)
+        return self.finish_episode()
+
+    def train(self, generations):
+        """
+        Обучение агента на заданном количестве эпизодов.
+
+        Аргументы:
+            generations (int): количество эпизодов
+        """
+        for _ in range(generations):
+            self.run_episode()
@@ -3,6 +3,7 @@
 # Входные данные:
 #   x (float) - координата X центра блока
 #   y (float) - координата Y центра блока
+#   space (pymunk.Space) - пространство, в которое добавляется блок (по умолчанию общее)
 # Выходные данные:
 #   body (pymunk.Body) - объект физического тела, добавленного в пространство
 
@@ -11,7 +12,7 @@ from config import BLOCK_SIZE, START_Y
 from physics import space
 
 
-def create_block(x, y):
+def create_block(x, y, space=space):
     """
     Функция создает физический блок с параметрами:
     - масса: 1
@@ -23,6 +24,7 @@ def create_block(x, y):
     Параметры:
     x (float): координата X центра блока
     y (float): координата Y центра блока
+    space (pymunk.Space): физическое пространство для блока
 
     Возвращает:
     pymunk.Body: объект физического тела, добавленного в пространство
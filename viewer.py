@@ -0,0 +1,105 @@
+# Раздел: Отрисовка в отдельном процессе
+# Назначение: Тренер публикует компактные снимки поз блоков (x, y, угол плоским массивом float64)
+#   в разделяемую память, а отдельный процесс Pygame рисует последний снимок со своей частотой кадров.
+#   Тренер не ждёт дисплей: запись снимка не блокируется, а просмотрщик пропускает
+#   снимки, которые не успел нарисовать, и снимки, записанные во время чтения
+# Входные данные:
+#   fps (int) - частота кадров просмотрщика (и наибольшая частота публикации снимков)
+#   capacity (int) - наибольшее количество блоков в снимке (по умолчанию MAX_BLOCKS + 1)
+# Выходные данные:
+#   Viewer - процесс просмотрщика с методами publish и close
+
+import multiprocessing as mp
+import time
+import numpy as np
+from config import MAX_BLOCKS
+
+# Заголовок снимка: счётчик версий (нечётный - идёт запись), количество блоков и статистика
+HEADER = ('seq', 'count', 'generation', 'placed', 'best', 'epsilon')
+H = len(HEADER)
+
+
+def _view(buffer, fps):
+    """
+    Цикл процесса просмотрщика: обработка событий окна и отрисовка последнего
+    целого снимка не чаще fps кадров в секунду. Закрытие окна завершает только просмотрщик.
+
+    Аргументы:
+        buffer (mp.Array): разделяемая память снимков
+        fps (int): частота кадров
+    """
+    import pygame as pg
+    from render import clock, draw_poses
+
+    data = np.frombuffer(buffer, dtype=np.float64)
+    seen = -1
+    while True:
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                pg.quit()
+                return
+        seq = data[0]
+        if seq != seen and seq % 2 == 0:
+            frame = data[:H + 3 * int(data[1])].copy()
+            # Снимок перезаписан во время копирования - кадр пропускается
+            if data[0] == seq:
+                seen = seq
+                _, count, generation, placed, best, epsilon = frame[:H]
+                draw_poses(frame[H:].reshape(-1, 3), [
+                    f"Gen: {int(generation)}",
+                    f"Blocks: {int(placed)}",
+                    f"Best: {int(best)}",
+                    f"Epsilon: {epsilon:.2f}",
+                ])
+        clock.tick(fps)
+
+
+class Viewer:
+    def __init__(self, fps=60, capacity=MAX_BLOCKS + 1):
+        """
+        Запуск процесса просмотрщика:
+            - buffer, data: разделяемая память снимков и её представление NumPy
+            - interval: наименьший интервал между публикациями (секунды)
+            - last: время последней публикации
+        """
+        self.capacity = capacity
+        self.buffer = mp.Array('d', H + 3 * capacity, lock=False)
+        self.data = np.frombuffer(self.buffer, dtype=np.float64)
+        self.interval = 1 / fps
+        self.last = 0.0
+        self.process = mp.Process(target=_view, args=(self.buffer, fps), daemon=True)
+        self.process.start()
+
+    def publish(self, game, trainer):
+        """
+        Запись снимка поз блоков игры. Снимки чаще частоты кадров просмотрщика не пишутся.
+
+        Аргументы:
+            game (Game): игра
+            trainer (Trainer): тренер (статистика для подписи кадра)
+
+        Возвращает:
+            bool: True, если снимок записан
+        """
+        now = time.perf_counter()
+        if now - self.last < self.interval:
+            return False
+        self.last = now
+        data = self.data
+        blocks = game.blocks[:self.capacity]
+        data[0] += 1
+        poses = data[H:H + 3 * len(blocks)].reshape(-1, 3)
+        for i, b in enumerate(blocks):
+            x, y = b.position
+            poses[i] = x, y, b.angle
+        data[1:H] = len(blocks), trainer.generation, game.placed_blocks, trainer.best_score, game.agent.epsilon
+        data[0] += 1
+        return True
+
+    def close(self):
+        """
+        Завершение процесса просмотрщика.
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()